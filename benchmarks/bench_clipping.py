@@ -0,0 +1,49 @@
+"""
+Time the pass ending the edges on the bounding box after the sweep, and
+the clipping of the finished diagram to a window. Run from the root of
+the repository with:
+
+    python -m benchmarks.bench_clipping
+"""
+
+import time
+import numpy as np
+
+from src import Fortune, BoundingBox
+from src.geom_utils import finish_edges, clip_segments
+
+SIZES = [1_000, 4_000, 16_000]
+
+
+def main():
+    rng = np.random.default_rng(0)
+
+    print(f"{'sites':>8}{'half-edges':>12}{'finish':>12}{'clip':>12}")
+
+    for n in SIZES:
+        fortune = Fortune(rng.random((n, 2)))
+        while fortune.step() is not None:
+            pass
+
+        edges = fortune.voronoi.half_edges
+        bounding_box = BoundingBox(
+            fortune.sites + fortune.voronoi.vertices, fortune.offset
+        )
+
+        start = time.perf_counter()
+        finish_edges(edges, bounding_box)
+        finish = time.perf_counter() - start
+
+        origins = np.array([(edge.origin.x, edge.origin.y) for edge in edges])
+        ends = np.array([(edge.twin.origin.x, edge.twin.origin.y) for edge in edges])
+        window = BoundingBox.from_limits(0.25, 0.75, 0.25, 0.75)
+
+        start = time.perf_counter()
+        clip_segments(origins, ends, window)
+        clip = time.perf_counter() - start
+
+        print(f"{n:>8}{len(edges):>12}{finish * 1e3:>10.1f}ms{clip * 1e3:>10.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
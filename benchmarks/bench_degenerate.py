@@ -0,0 +1,59 @@
+"""
+Time the sweep on degenerate layouts (grids, rows sharing a y-coordinate,
+duplicated sites) against random sites of the same size. Run from the
+root of the repository with:
+
+    python -m benchmarks.bench_degenerate
+"""
+
+import time
+import numpy as np
+
+from src import Fortune
+
+N_RUNS = 3
+
+
+def get_inputs(side: int):
+    rng = np.random.default_rng(0)
+    n = side * side
+    grid = np.stack(np.meshgrid(np.arange(side), np.arange(side)), axis=-1)
+    grid = grid.reshape(-1, 2).astype(float)
+
+    return {
+        "random": rng.random((n, 2)) * side,
+        "grid": grid,
+        "jittered grid": grid + rng.random(grid.shape) * 1e-3,
+        "top row": np.concatenate(
+            (
+                np.stack((np.arange(side), np.full(side, side)), axis=1),
+                rng.random((n - side, 2)) * side,
+            )
+        ),
+        "horizontal line": np.stack((np.arange(n), np.zeros(n)), axis=1),
+        "duplicates": np.concatenate((rng.random((n // 2, 2)) * side,) * 2),
+    }
+
+
+def main():
+    # compile the kernels
+    Fortune(np.random.default_rng(1).random((10, 2))).launch(plot=False)
+
+    print(f"{'input':<20}{'sites':>8}{'faces':>8}{'median':>12}")
+
+    for side in (20, 40):
+        for name, sites in get_inputs(side).items():
+            times = []
+            for _ in range(N_RUNS):
+                start = time.perf_counter()
+                voronoi = Fortune(sites).launch(plot=False)
+                times.append(time.perf_counter() - start)
+
+            print(
+                f"{name:<20}{len(sites):>8}{len(voronoi.faces):>8}"
+                f"{np.median(times) * 1e3:>10.1f}ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Time the bulk exports of the cells of a diagram, from its arrays, against
+GeoJSON features built one face and one half-edge at a time. Run from the
+root of the repository with:
+
+    python -m benchmarks.bench_export
+"""
+
+import io
+import json
+import time
+import numpy as np
+
+from src import Diagram, Fortune, write_geojson, to_wkb
+
+N_RUNS = 3
+
+
+def get_features_by_faces(voronoi):
+    features = []
+
+    for face in voronoi.faces:
+        ring = [(edge.origin.x, edge.origin.y) for edge in face.get_edges()]
+        features.append(
+            {
+                "type": "Feature",
+                "geometry": {"type": "Polygon", "coordinates": [ring + ring[:1]]},
+                "properties": {},
+            }
+        )
+
+    return json.dumps({"type": "FeatureCollection", "features": features})
+
+
+def main():
+    print(f"{'method':<18}{'sites':>8}{'median':>12}")
+
+    for n in (10000, 50000):
+        sites = np.random.default_rng(0).random((n, 2))
+
+        voronoi = Fortune(sites).launch(plot=False)
+        diagram = Diagram.from_tesselation(voronoi)
+
+        methods = {
+            "faces, geojson": lambda: get_features_by_faces(voronoi),
+            "bulk, geojson": lambda: write_geojson(diagram, io.BytesIO()),
+            "bulk, wkb": lambda: to_wkb(diagram),
+        }
+
+        for name, method in methods.items():
+            times = []
+            for _ in range(N_RUNS):
+                start = time.perf_counter()
+                method()
+                times.append(time.perf_counter() - start)
+
+            print(f"{name:<18}{n:>8}{np.median(times) * 1e3:>10.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
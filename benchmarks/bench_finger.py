@@ -0,0 +1,53 @@
+"""
+Count the breakpoints evaluated by the searches of the beach line, and time
+the sweep, with and without the finger search, on uniform and clustered
+sites. Run from the root of the repository with:
+
+    python -m benchmarks.bench_finger
+"""
+
+import time
+import numpy as np
+
+from src import Fortune
+
+N_RUNS = 3
+
+
+def get_clusters(rng, n: int, n_clusters: int, spread: float):
+    centers = rng.random((n_clusters, 2))
+    return centers[rng.integers(0, n_clusters, n)] + rng.normal(0, spread, (n, 2))
+
+
+def main():
+    # compile the kernels
+    Fortune(np.random.default_rng(1).random((10, 2))).launch(plot=False)
+
+    print(f"{'sites':<16}{'n':>8}{'finger':>8}{'evaluations':>14}{'median':>12}")
+
+    for n in (2000, 10000):
+        rng = np.random.default_rng(0)
+        inputs = {
+            "uniform": rng.random((n, 2)),
+            "100 clusters": get_clusters(rng, n, 100, 1e-3),
+            "10 clusters": get_clusters(rng, n, 10, 1e-2),
+        }
+
+        for name, sites in inputs.items():
+            for finger_search in (False, True):
+                times = []
+                for _ in range(N_RUNS):
+                    fortune = Fortune(sites, finger_search=finger_search)
+                    start = time.perf_counter()
+                    fortune.launch(plot=False)
+                    times.append(time.perf_counter() - start)
+
+                print(
+                    f"{name:<16}{n:>8}{'yes' if finger_search else 'no':>8}"
+                    f"{fortune.beach_line.n_evaluations:>14}"
+                    f"{np.median(times) * 1e3:>10.1f}ms"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Time the import of the package and of its modules in fresh interpreters,
+and check which heavy dependencies they load. Run from the root of the
+repository with:
+
+    python -m benchmarks.bench_import
+"""
+
+import sys
+import json
+import statistics
+import subprocess
+
+N_RUNS = 5
+
+STATEMENTS = [
+    "import numpy",
+    "import src",
+    "import src.fortune",
+    "from src import Fortune; Fortune([(0, 0), (1, 1), (2, 0)]).launch(plot=False)",
+    "import src; src.Visualizer",
+]
+
+HEAVY = ["matplotlib", "PIL", "numba"]
+
+SCRIPT = """
+import sys, time, json
+start = time.perf_counter()
+{statement}
+elapsed = time.perf_counter() - start
+print(json.dumps([elapsed, [name for name in {heavy} if name in sys.modules]]))
+"""
+
+
+def run(statement: str):
+    script = SCRIPT.format(statement=statement, heavy=HEAVY)
+    output = subprocess.run(
+        [sys.executable, "-c", script], capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def main():
+    print(f"{'statement':<80}{'median':>10}  loaded")
+
+    for statement in STATEMENTS:
+        runs = [run(statement) for _ in range(N_RUNS)]
+        median = statistics.median(elapsed for elapsed, _ in runs)
+        loaded = ", ".join(runs[-1][1]) or "-"
+        print(f"{statement:<80}{median * 1e3:>8.0f}ms  {loaded}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Compare the pure-Python and the compiled versions of the numeric kernels.
+Run from the root of the repository with:
+
+    python -m benchmarks.bench_kernels
+"""
+
+import math
+import timeit
+import numpy as np
+
+from src import geom_utils
+from src.jit import BACKEND
+
+N_CHECKS = 100_000
+N_CALLS = 200_000
+
+
+def get_arguments(rng, kernel):
+    coords = rng.uniform(-10, 10, (N_CHECKS, 6))
+
+    if kernel == "get_intersection_coords":
+        # foci above the sweep line, with some equal heights
+        coords[:, 1] = np.abs(coords[:, 1])
+        coords[:, 3] = np.where(
+            rng.random(N_CHECKS) < 0.1, coords[:, 1], np.abs(coords[:, 3])
+        )
+        coords[:, 4] = -np.abs(coords[:, 4])
+        coords[:, 5] = math.inf
+
+    if kernel == "get_parabola_y":
+        coords = coords[:, :4]
+        coords[:, 2] = np.abs(coords[:, 2])
+        coords[:, 3] = -np.abs(coords[:, 3])
+
+    return [tuple(map(float, row)) for row in coords]
+
+
+def main():
+    print(f"backend: {BACKEND}")
+
+    if BACKEND != "numba":
+        print("Numba is not installed, the kernels are not compiled.")
+        return
+
+    rng = np.random.default_rng(0)
+    kernels = [
+        "get_parabola_y",
+        "get_intersection_coords",
+        "get_orientation_filter",
+        "get_circumcircle",
+    ]
+
+    print(f"{'kernel':<26}{'python':>12}{'numba':>12}{'speedup':>10}{'identical':>11}")
+
+    for name in kernels:
+        kernel = getattr(geom_utils, name)
+        arguments = get_arguments(rng, name)
+
+        compiled = [kernel(*args) for args in arguments]
+        interpreted = [kernel.py_func(*args) for args in arguments]
+        identical = np.array_equal(
+            np.array(compiled, dtype=float),
+            np.array(interpreted, dtype=float),
+            equal_nan=True,
+        )
+
+        args = arguments[0]
+        python = timeit.timeit(lambda: kernel.py_func(*args), number=N_CALLS) / N_CALLS
+        numba = timeit.timeit(lambda: kernel(*args), number=N_CALLS) / N_CALLS
+
+        print(
+            f"{name:<26}{python * 1e9:>10.0f}ns{numba * 1e9:>10.0f}ns"
+            f"{python / numba:>9.1f}x{str(identical):>11}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Time the periodic diagrams computed with a halo of images near the
+boundaries against the sweep over nine tiles of the sites. Run from the
+root of the repository with:
+
+    python -m benchmarks.bench_periodic
+"""
+
+import time
+import numpy as np
+
+from src import Fortune, BoundingBox, compute_periodic
+
+N_RUNS = 3
+
+
+def get_tiles(sites: np.ndarray):
+    return np.concatenate(
+        [sites + (i, j) for i in (-1, 0, 1) for j in (-1, 0, 1)], axis=0
+    )
+
+
+def main():
+    # compile the kernels
+    Fortune(np.random.default_rng(1).random((10, 2))).launch(plot=False)
+
+    domain = BoundingBox.from_limits(0, 1, 0, 1)
+    methods = {
+        "halo": lambda sites: compute_periodic(sites, domain),
+        "nine tiles": lambda sites: Fortune(get_tiles(sites)).launch(plot=False),
+    }
+
+    print(f"{'method':<12}{'sites':>8}{'median':>12}")
+
+    for n in (250, 1000):
+        sites = np.random.default_rng(0).random((n, 2))
+
+        for name, method in methods.items():
+            times = []
+            for _ in range(N_RUNS):
+                start = time.perf_counter()
+                method(sites)
+                times.append(time.perf_counter() - start)
+
+            print(f"{name:<12}{n:>8}{np.median(times) * 1e3:>10.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,54 @@
+from .batch import compute_all
 from .beach_line import Arc, BreakPoint, BeachLine
 from .bounding_box import BoundingBox
+from .cache import ResultCache
+from .checkpoint import save_checkpoint, load_checkpoint, run_with_checkpoints
+from .diagram import Diagram
 from .event_queue import Event, SiteEvent, CircleEvent, EventQueue
+from .export import to_wkb, iter_wkb, write_geojson, write_shapefile
 from .fortune import Fortune
+from .interpolation import NaturalNeighbourInterpolator
+from .periodic import compute_periodic
 from .point import Point
+from .raster import rasterize
+from .service import (
+    SweepInterrupted,
+    SweepTimeout,
+    SweepCancelled,
+    SweepService,
+    compute_async,
+)
 from .sweep_line import SweepLine
+from .trace import TraceRecorder, TraceEvent, Replayer, read_trace
 from .tesselation import Vertex, HalfEdge, Face, Tesselation
-from .visualizer import Visualizer
+from .validation import ValidationError, check_diagram, fuzz
+from .window import select_sites, compute_window
+
+# the visualisation depends on Matplotlib and Pillow, which are slow to import
+# and not needed by the computations, so it is loaded on first use
+_lazy = {
+    "Visualizer": "visualizer",
+    "Frame": "animation",
+    "Recording": "animation",
+    "SweepRecorder": "animation",
+    "record": "animation",
+    "render_frames": "animation",
+    "export_animation": "animation",
+    "animate": "animation",
+}
+
+
+def __getattr__(name):
+    if name not in _lazy:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    import importlib
+
+    value = getattr(importlib.import_module(f".{_lazy[name]}", __name__), name)
+    globals()[name] = value
+
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + list(_lazy))
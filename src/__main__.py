@@ -0,0 +1,77 @@
+import sys
+import argparse
+
+from .batch import READERS, WRITERS, run
+
+
+def main(argv: list = None):
+    parser = argparse.ArgumentParser(
+        prog="python -m src",
+        description="Compute the Voronoi diagrams of site sets, without display.",
+    )
+    parser.add_argument(
+        "inputs",
+        nargs="*",
+        default=["-"],
+        help="files of site sets, - for the standard input (default)",
+    )
+    parser.add_argument(
+        "-f",
+        "--input-format",
+        choices=sorted(READERS),
+        help="format of the inputs, guessed from their extension by default "
+        "(bin for the standard input)",
+    )
+    parser.add_argument(
+        "-o", "--output", default="-", help="output file, - for the standard output"
+    )
+    parser.add_argument(
+        "-t", "--output-format", choices=sorted(WRITERS), default="jsonl"
+    )
+    parser.add_argument(
+        "-j",
+        "--workers",
+        type=int,
+        default=1,
+        help="number of workers, processes or threads (see --threads), 0 for one "
+        "per CPU",
+    )
+    parser.add_argument(
+        "--threads",
+        action=argparse.BooleanOptionalAction,
+        help="run the workers in threads rather than processes, by default "
+        "on free-threaded builds only",
+    )
+    parser.add_argument(
+        "--offset", type=float, default=0.5, help="offset of the bounding box"
+    )
+    parser.add_argument(
+        "--summary",
+        action="store_true",
+        help="only write the sizes and the timing of the jobs",
+    )
+    args = parser.parse_args(argv)
+
+    output = sys.stdout.buffer if args.output == "-" else open(args.output, "wb")
+
+    try:
+        run(
+            args.inputs,
+            output,
+            args.input_format,
+            args.output_format,
+            args.offset,
+            args.workers or None,
+            args.summary,
+            args.threads,
+        )
+    except BrokenPipeError:
+        # the reader of the pipe went away, e.g. head
+        sys.stderr.close()
+    finally:
+        if output is not sys.stdout.buffer:
+            output.close()
+
+
+if __name__ == "__main__":
+    main()
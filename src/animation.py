@@ -0,0 +1,313 @@
+import itertools
+import shutil
+import subprocess
+import numpy as np
+
+from PIL import GifImagePlugin, Image
+
+from .batch import imap
+from .event_queue import CircleEvent
+from .fortune import Fortune
+from .visualizer import Visualizer, get_points
+
+
+class Frame:
+    def __init__(
+        self,
+        n_segments: int,
+        n_vertices: int,
+        foci: np.ndarray = None,
+        y_sweep_line: float = None,
+        circle: tuple = None,
+    ):
+        """
+        A snapshot of the sweep. The edges and the vertices only grow during
+        the sweep, so a frame just stores how many of them were known when
+        it was taken.
+        """
+        self.n_segments = n_segments
+        self.n_vertices = n_vertices
+        self.foci = foci
+        self.y_sweep_line = y_sweep_line
+        self.circle = circle
+
+
+class Recording:
+    def __init__(self, sites, bounding_box):
+        """
+        Cheap snapshots of the execution of the Fortune's algorithm,
+        from which the frames of an animation can be rendered later on.
+        """
+        self.sites = get_points(sites)
+        self.bounding_box = bounding_box
+        self.segments = []
+        self.vertices = []
+        self.frames = []
+
+    def add_frame(
+        self,
+        segments: list = (),
+        vertices: list = (),
+        foci: np.ndarray = None,
+        y_sweep_line: float = None,
+        circle: tuple = None,
+    ):
+        """
+        Append a frame, given the segments and the vertices defined since
+        the previous one.
+        """
+        self.segments.extend(segments)
+        self.vertices.extend(vertices)
+        self.frames.append(
+            Frame(len(self.segments), len(self.vertices), foci, y_sweep_line, circle)
+        )
+
+    def get_segments(self):
+        return np.array(self.segments, dtype=float).reshape(-1, 2, 2)
+
+    def get_vertices(self):
+        return np.array(self.vertices, dtype=float).reshape(-1, 2)
+
+
+class SweepRecorder:
+    def __init__(self, fortune):
+        """
+        Fill a recording with snapshots of a running sweep.
+        """
+        self.fortune = fortune
+        self.recording = Recording(fortune.sites, fortune.bounding_box)
+
+        # edges which are not drawn yet because an end is still undefined
+        self.pending = []
+        self.seen = set()
+        self.n_edges = 0
+        self.n_vertices = 0
+
+    def get_new_segments(self):
+        """
+        Get the segments whose both ends got defined since the last call.
+        """
+        half_edges = self.fortune.voronoi.half_edges
+
+        for edge in half_edges[self.n_edges :]:
+            if edge.twin is not None and id(edge.twin) not in self.seen:
+                self.seen.add(id(edge))
+                self.pending.append(edge)
+        self.n_edges = len(half_edges)
+
+        segments, pending = [], []
+        for edge in self.pending:
+            start, end = edge.origin, edge.twin.origin
+            if start is not None and end is not None:
+                segments.append(((start.x, start.y), (end.x, end.y)))
+            else:
+                pending.append(edge)
+        self.pending = pending
+
+        return segments
+
+    def get_new_vertices(self):
+        vertices = self.fortune.voronoi.vertices[self.n_vertices :]
+        self.n_vertices += len(vertices)
+        return [(vertex.x, vertex.y) for vertex in vertices]
+
+    def capture(self, event=None, arcs: bool = True):
+        """
+        Take a snapshot of the current state of the sweep.
+        """
+        foci = y_sweep_line = circle = None
+
+        if arcs:
+            foci = get_points(
+                [arc.focus for arc in self.fortune.beach_line.get_arcs_ordered()]
+            )
+            y_sweep_line = self.fortune.sweep_line.get_height()
+
+        if isinstance(event, CircleEvent):
+            circle = (event.point.x, event.point.y, event.radius, event.is_valid)
+
+        self.recording.add_frame(
+            self.get_new_segments(),
+            self.get_new_vertices(),
+            foci,
+            y_sweep_line,
+            circle,
+        )
+
+
+def record(fortune, step: int = 1):
+    """
+    Run the sweep, taking a snapshot every @step events, and a last one
+    of the final diagram.
+    """
+    recorder = SweepRecorder(fortune)
+
+    # the arcs of the sites sharing the highest y-coordinate are set up
+    # before the first event
+    i = 0
+    if not fortune.beach_line.is_empty():
+        recorder.capture()
+        i += 1
+
+    while (event := fortune.step()) is not None:
+        if i % step == 0:
+            recorder.capture(event)
+        i += 1
+
+    fortune.finish()
+    recorder.capture(arcs=False)
+
+    return recorder.recording
+
+
+def _render(task):
+    bounding_box, figsize, dpi, sites, segments, vertices, frames = task
+
+    visualizer = Visualizer(None, bounding_box, figsize=figsize, save_dir=None)
+    visualizer.figure.set_dpi(dpi)
+
+    images = []
+    for frame in frames:
+        visualizer.plot(
+            edges=segments[: frame.n_segments],
+            vertices=vertices[: frame.n_vertices],
+            sites=sites,
+            arcs=frame.foci,
+            y_sweep_line=frame.y_sweep_line,
+        )
+        if frame.circle:
+            visualizer.plot_circle(*frame.circle)
+
+        images.append(visualizer.render())
+
+    return images
+
+
+def render_frames(
+    recording: Recording,
+    max_frames: int = None,
+    workers: int = None,
+    chunk_size: int = 8,
+    figsize: tuple = (8, 8),
+    dpi: int = 100,
+):
+    """
+    Render the frames of a recording as RGB arrays, in order, using a pool
+    of @workers processes (or the current one if @workers is 1), with a
+    bounded number of chunks of @chunk_size frames in flight. At most
+    @max_frames evenly spaced frames are kept.
+    """
+    frames = recording.frames
+
+    if max_frames and len(frames) > max_frames:
+        keep = np.unique(np.linspace(0, len(frames) - 1, max_frames).round())
+        frames = [frames[int(i)] for i in keep]
+
+    segments = recording.get_segments()
+    vertices = recording.get_vertices()
+
+    tasks = (
+        (
+            recording.bounding_box,
+            figsize,
+            dpi,
+            recording.sites,
+            segments[: chunk[-1].n_segments],
+            vertices[: chunk[-1].n_vertices],
+            chunk,
+        )
+        for chunk in (
+            frames[i : i + chunk_size] for i in range(0, len(frames), chunk_size)
+        )
+    )
+
+    # the rendered frames are large, so that few chunks are kept in flight
+    for images in imap(_render, tasks, workers, threads=False, in_flight=2):
+        yield from images
+
+
+def write_gif(images, path: str, fps: float = 10):
+    """
+    Write the frames to a GIF file as they come, each with its own palette,
+    rather than holding all of them until the end as Pillow does.
+    """
+    # the plots have few colours, which the fast octree keeps
+    quantize = lambda image: Image.fromarray(image).quantize(
+        method=Image.Quantize.FASTOCTREE
+    )
+
+    images = iter(images)
+    first = quantize(next(images))
+    duration = round(1000 / fps)
+
+    with open(path, "wb") as file:
+        header, _ = GifImagePlugin.getheader(first, info={"loop": 0})
+        file.write(b"".join(header))
+
+        for frame in itertools.chain((first,), map(quantize, images)):
+            data = GifImagePlugin.getdata(
+                frame, duration=duration, include_color_table=True
+            )
+            file.write(b"".join(data))
+
+        file.write(b";")  # trailer
+
+
+def write_mp4(images, path: str, fps: float = 10):
+    if not shutil.which("ffmpeg"):
+        raise RuntimeError("ffmpeg is required to write MP4 files!")
+
+    images = iter(images)
+    first = next(images)
+    height, width, _ = first.shape
+
+    command = [
+        "ffmpeg", "-y", "-loglevel", "error",
+        "-f", "rawvideo", "-pix_fmt", "rgb24",
+        "-s", f"{width}x{height}", "-r", str(fps), "-i", "-",
+        "-vf", "pad=ceil(iw/2)*2:ceil(ih/2)*2",
+        "-vcodec", "libx264", "-pix_fmt", "yuv420p",
+        path,
+    ]  # fmt: skip
+
+    with subprocess.Popen(command, stdin=subprocess.PIPE) as process:
+        process.stdin.write(first.tobytes())
+        for image in images:
+            process.stdin.write(image.tobytes())
+        process.stdin.close()
+
+    if process.returncode:
+        raise RuntimeError(f"ffmpeg exited with code {process.returncode}!")
+
+
+def export_animation(recording: Recording, path: str, fps: float = 10, **kwargs):
+    """
+    Encode a recording straight into a GIF or MP4 file, without writing
+    the intermediate frames to the disk. The keyword arguments are passed
+    to render_frames.
+    """
+    writers = {".gif": write_gif, ".mp4": write_mp4}
+    extension = path[path.rfind(".") :].lower()
+
+    if extension not in writers:
+        raise ValueError(f"Unsupported animation format {extension}!")
+
+    writers[extension](render_frames(recording, **kwargs), path, fps)
+
+
+def animate(
+    sites: list,
+    path: str,
+    step: int = 1,
+    fps: float = 10,
+    max_frames: int = 300,
+    **kwargs,
+):
+    """
+    Compute the Voronoi diagram of some sites and export an animation of
+    the sweep, of at most @max_frames frames.
+    """
+    recording = record(Fortune(sites), step)
+    export_animation(recording, path, fps, max_frames=max_frames, **kwargs)
+
+    return recording
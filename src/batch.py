@@ -0,0 +1,278 @@
+import io
+import os
+import sys
+import csv
+import json
+import time
+import struct
+import numpy as np
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from .fortune import Fortune
+
+# binary input: a stream of site sets, each being the number of sites
+# followed by their coordinates as little-endian doubles
+SITES_HEADER = struct.Struct("<I")
+
+# binary output: per job, a header followed by the vertices (n_vertices, 2)
+# and the edges (n_edges, 4) as little-endian doubles, and the sites on
+# both sides of the edges (n_edges, 2) as little-endian int32, -1 standing
+# for the outside of the bounding box
+RESULT_HEADER = struct.Struct("<4sIIIId")  # magic, job, #sites, #vertices, #edges, time
+RESULT_MAGIC = b"FVOR"
+
+
+def _read(file, size: int):
+    data = file.read(size)
+    if len(data) != size:
+        raise EOFError("Truncated site stream!")
+    return data
+
+
+def read_binary(file):
+    """
+    Read the site sets of a binary stream.
+    """
+    while header := file.read(SITES_HEADER.size):
+        if len(header) != SITES_HEADER.size:
+            raise EOFError("Truncated site stream!")
+
+        (n_sites,) = SITES_HEADER.unpack(header)
+        yield np.frombuffer(_read(file, 16 * n_sites), dtype="<f8").reshape(-1, 2)
+
+
+def read_csv(file):
+    """
+    Read the site sets of a CSV file, either as a single set of x, y rows,
+    or as job, x, y rows grouped by job.
+    """
+    text = io.TextIOWrapper(file, newline="")
+
+    # detach the wrapper, which would otherwise close @file, the standard
+    # input included, once collected
+    try:
+        rows = [row for row in csv.reader(text) if row]
+    finally:
+        text.detach()
+
+    # skip a header
+    if rows and not _is_number(rows[0][-1]):
+        rows = rows[1:]
+
+    if not rows:
+        return
+
+    if len(rows[0]) == 2:
+        yield np.array(rows, dtype=float)
+        return
+
+    jobs = {}
+    for job, x, y in rows:
+        jobs.setdefault(job, []).append((float(x), float(y)))
+
+    for sites in jobs.values():
+        yield np.array(sites, dtype=float)
+
+
+def read_npy(file):
+    """
+    Read the site sets of a .npy file, holding a (n, 2) or a (k, n, 2) array,
+    or of a .npz file, holding a set per array.
+    """
+    data = np.load(file)
+
+    if isinstance(data, np.lib.npyio.NpzFile):
+        with data:
+            for name in data.files:
+                yield data[name].reshape(-1, 2)
+        return
+
+    if data.ndim == 3:
+        yield from data
+    else:
+        yield data.reshape(-1, 2)
+
+
+def _is_number(value: str):
+    try:
+        float(value)
+    except ValueError:
+        return False
+    return True
+
+
+READERS = {"bin": read_binary, "csv": read_csv, "npy": read_npy}
+
+
+def get_format(path: str, default: str = "bin"):
+    extension = path[path.rfind(".") + 1 :].lower() if "." in path else ""
+    return {"npy": "npy", "npz": "npy", "csv": "csv", "bin": "bin"}.get(
+        extension, default
+    )
+
+
+def read_jobs(paths: list, format: str = None):
+    """
+    Read the site sets of some files, "-" standing for the standard input.
+    """
+    for path in paths:
+        reader = READERS[format or get_format(path)]
+
+        if path == "-":
+            # np.load needs a seekable file
+            stdin = sys.stdin.buffer
+            yield from reader(io.BytesIO(stdin.read()) if reader is read_npy else stdin)
+            continue
+
+        with open(path, "rb") as file:
+            yield from reader(file)
+
+
+def compute(job: tuple):
+    """
+    Compute the diagram of a site set and flatten it: its vertices, its
+    edges, each pair of twins once, and the indices in the input of the
+    sites on both sides of the edges.
+    """
+    index, sites, offset = job
+    sites = np.asarray(sites, dtype=float).reshape(-1, 2)
+
+    start = time.perf_counter()
+    fortune = Fortune(sites, offset)
+    fortune.launch(plot=False)
+    elapsed = time.perf_counter() - start
+
+    diagram = fortune.compact()
+
+    return {
+        "job": index,
+        "n_sites": len(sites),
+        "time": elapsed,
+        "vertices": diagram.vertices,
+        "edges": diagram.get_segments().reshape(-1, 4),
+        "sites": diagram.get_edge_sites(),
+    }
+
+
+def write_jsonl(result: dict, file, summary: bool = False):
+    record = {
+        "job": result["job"],
+        "n_sites": result["n_sites"],
+        "n_vertices": len(result["vertices"]),
+        "n_edges": len(result["edges"]),
+        "time": result["time"],
+    }
+
+    if not summary:
+        record["vertices"] = result["vertices"].tolist()
+        record["edges"] = result["edges"].tolist()
+        record["sites"] = result["sites"].tolist()
+
+    file.write((json.dumps(record, separators=(",", ":")) + "\n").encode())
+
+
+def write_binary(result: dict, file, summary: bool = False):
+    vertices, edges = result["vertices"], result["edges"]
+
+    file.write(
+        RESULT_HEADER.pack(
+            RESULT_MAGIC,
+            result["job"],
+            result["n_sites"],
+            0 if summary else len(vertices),
+            0 if summary else len(edges),
+            result["time"],
+        )
+    )
+
+    if not summary:
+        file.write(vertices.astype("<f8").tobytes())
+        file.write(edges.astype("<f8").tobytes())
+        file.write(result["sites"].astype("<i4").tobytes())
+
+
+WRITERS = {"jsonl": write_jsonl, "bin": write_binary}
+
+
+def is_free_threaded():
+    """
+    Whether the interpreter runs without the GIL, so that threads run
+    Python code in parallel.
+    """
+    return not getattr(sys, "_is_gil_enabled", lambda: True)()
+
+
+def imap(function, jobs, workers: int = None, threads: bool = None, in_flight: int = 4):
+    """
+    Map @function over @jobs with a pool of @workers threads if @threads,
+    or processes otherwise, yielding the results in order while keeping
+    @in_flight jobs per worker in flight at most, or in the current thread
+    if @workers is 1. There is a worker per CPU by default. Threads are
+    used by default on free-threaded builds, where they use several cores
+    without spawning processes nor pickling the jobs.
+    """
+    workers = workers or os.cpu_count() or 1
+
+    if workers == 1:
+        yield from map(function, jobs)
+        return
+
+    if threads is None:
+        threads = is_free_threaded()
+
+    pool = ThreadPoolExecutor if threads else ProcessPoolExecutor
+
+    with pool(workers) as executor:
+        pending = deque()
+
+        for job in jobs:
+            pending.append(executor.submit(function, job))
+
+            if len(pending) >= in_flight * workers:
+                yield pending.popleft().result()
+
+        while pending:
+            yield pending.popleft().result()
+
+
+def _launch(job: tuple):
+    sites, offset, compact = job
+    return Fortune(sites, offset).launch(plot=False, compact=compact)
+
+
+def compute_all(
+    site_sets, offset: float = 0.5, workers: int = None, compact: bool = False
+):
+    """
+    Compute the diagrams of several site sets in a pool of @workers threads,
+    and return them in order, as Diagram objects if @compact. The sweeps
+    share nothing, so that they run in parallel on free-threaded builds.
+    """
+    jobs = ((sites, offset, compact) for sites in site_sets)
+    return list(imap(_launch, jobs, workers, threads=True))
+
+
+def run(
+    paths: list,
+    output,
+    input_format: str = None,
+    output_format: str = "jsonl",
+    offset: float = 0.5,
+    workers: int = None,
+    summary: bool = False,
+    threads: bool = None,
+):
+    """
+    Compute the diagrams of the site sets read from @paths and stream them
+    to the binary file @output as they are ready.
+    """
+    jobs = (
+        (i, sites, offset) for i, sites in enumerate(read_jobs(paths, input_format))
+    )
+    write = WRITERS[output_format]
+
+    for result in imap(compute, jobs, workers, threads):
+        write(result, output, summary)
+        output.flush()
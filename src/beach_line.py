@@ -1,9 +1,12 @@
-import numpy as np
+import bisect
 
 from .point import Point
 from .tesselation import HalfEdge
 from .geom_utils import get_intersection, get_y_parabola
 
+# breakpoints the finger search walks through before descending from the root
+FINGER_STEPS = 8
+
 
 class Node:
     def __init__(
@@ -48,9 +51,23 @@ class Arc(Node):
         self.focus = focus
         self.event = None
 
+        # breakpoints surrounding the arc on the beach line
+        self.left_breakpoint = None
+        self.right_breakpoint = None
+
     def set_event(self, event):
         self.event = event
 
+    def is_removed(self):
+        """
+        Whether the arc has been removed from the beach line, the
+        breakpoints around it being then attached to other arcs.
+        """
+        left, right = self.left_breakpoint, self.right_breakpoint
+        return (left is not None and left.right_arc is not self) or (
+            right is not None and right.left_arc is not self
+        )
+
     def get_plot(self, x, y_sweep_line: float):
         if self.focus.y - y_sweep_line == 0:
             return
@@ -73,65 +90,89 @@ class BreakPoint(Node):
         super().__init__(parent, parent_side, left, right)
         self.half_edge = half_edge
 
+        # arcs on both sides of the breakpoint
+        self.left_arc = None
+        self.right_arc = None
+
+        # x-coordinate of the breakpoint for the last height of the sweep line
+        self.cached_height = None
+        self.cached_x = None
+
     def set_half_edge(self, half_edge: HalfEdge):
         self.half_edge = half_edge
 
+    def set_arcs(self, left_arc: Arc, right_arc: Arc):
+        self.left_arc = left_arc
+        self.right_arc = right_arc
+        left_arc.right_breakpoint = self
+        right_arc.left_breakpoint = self
+        self.cached_height = None
+
     def get_left_arc(self):
-        def _recursive(node):
-            if isinstance(node, Arc):
-                return node
+        return self.left_arc
 
-            if node.right:
-                return _recursive(node.right)
+    def get_right_arc(self):
+        return self.right_arc
 
-            return _recursive(node.left)
+    def get_coords(self, y_sweep_line: float):
+        return get_intersection(self, y_sweep_line)
 
-        return _recursive(self.left)
+    def get_key(self, y_sweep_line: float = None):
+        if y_sweep_line is None:
+            raise ValueError("Missing parameter @y_sweep_line!")
 
-    def get_right_arc(self):
-        def _recursive(node):
-            if isinstance(node, Arc):
-                return node
+        if y_sweep_line != self.cached_height:
+            self.cached_x = self.get_coords(y_sweep_line).x
+            self.cached_height = y_sweep_line
 
-            if node.left:
-                return _recursive(node.left)
+        return self.cached_x
 
-            return _recursive(node.right)
 
-        return _recursive(self.right)
+class BeachLine:
+    def __init__(self, root: Arc | BreakPoint = None, finger_bands: list = None):
+        self.root = root
 
-    def get_coords(self, y_sweep_line: int):
-        left_arc = self.get_left_arc()
-        right_arc = self.get_right_arc()
+        # in the finger search mode, the sorted x-coordinates @finger_bands
+        # split the beach line into bands, and the searches start from the
+        # arc of the last site of their band, which the next sites of
+        # spatially coherent inputs fall close to
+        self.finger_bands = finger_bands
+        self.fingers = {}
 
-        x_p0, y_p0, x_p1, y_p1 = (
-            left_arc.focus.x,
-            left_arc.focus.y,
-            right_arc.focus.x,
-            right_arc.focus.y,
-        )
+        # number of breakpoints compared to the searched x-coordinates
+        self.n_evaluations = 0
 
-        if y_p0 == y_sweep_line:
-            return x_p0
+    def is_empty(self):
+        return not self.root
 
-        if y_p1 == y_sweep_line:
-            return x_p1
+    def initialize(self, foci: list):
+        """
+        Fill the empty beach line at once with the arcs of some foci sharing
+        the same y-coordinate, sorted by x, as a balanced tree. Return the
+        arcs and the breakpoints between them, from left to right.
+        """
+        arcs = [Arc(focus) for focus in foci]
+        breakpoints = [BreakPoint() for _ in arcs[1:]]
 
-        return get_intersection(self, y_sweep_line)
+        for left_arc, right_arc, breakpoint in zip(arcs, arcs[1:], breakpoints):
+            breakpoint.set_arcs(left_arc, right_arc)
 
-    def get_key(self, y_sweep_line: float = None):
-        if not y_sweep_line:
-            raise ValueError("Missing parameter @y_sweep_line!")
+        def _recursive(start, stop):
+            if stop - start == 1:
+                return arcs[start]
 
-        return self.get_coords(y_sweep_line).x
+            middle = (start + stop) // 2
+            node = breakpoints[middle - 1]
+            node.left = _recursive(start, middle)
+            node.right = _recursive(middle, stop)
+            node.left.set_parent(node, "left")
+            node.right.set_parent(node, "right")
 
+            return node
 
-class BeachLine:
-    def __init__(self, root: Arc | BreakPoint = None):
-        self.root = root
+        self.root = _recursive(0, len(arcs))
 
-    def is_empty(self):
-        return not self.root
+        return arcs, breakpoints
 
     def get_arcs_ordered(self):
         def _recursive(node, arcs):
@@ -169,47 +210,73 @@ class BeachLine:
         return nodes
 
     def get_three_consecutive_arcs(self, arc: Arc, reverse: bool = False):
-        arcs = self.get_arcs_ordered()
-
-        if not arcs:
-            return
+        side = "left" if reverse else "right"
+        arcs = [arc]
 
-        try:
-            pos = next(filter(lambda x: id(x[1]) == id(arc), enumerate(arcs)))[0]
-        except (StopIteration, IndexError):
-            print("Arc not found!")
-            return
+        for _ in range(2):
+            breakpoint = getattr(arcs[-1], f"{side}_breakpoint")
 
-        consecutive_arcs = (
-            arcs[np.max((0, pos - 2)) : np.min((len(arcs), pos + 1))]
-            if reverse
-            else arcs[pos : np.min((len(arcs), pos + 3))]
-        )
+            if not breakpoint:
+                return
 
-        if len(consecutive_arcs) == 3:
-            return consecutive_arcs
+            arcs.append(getattr(breakpoint, f"{side}_arc"))
 
-        return
+        return arcs[::-1] if reverse else arcs
 
     def get_surrounding_breakpoints(self, arc: Arc):
-        nodes = self.get_nodes_ordered()
-        pos = next(filter(lambda x: id(x[1]) == id(arc), enumerate(nodes)))[0]
-        return nodes[pos - 1], nodes[pos + 1]
+        return arc.left_breakpoint, arc.right_breakpoint
+
+    def split(self, arc: Arc, focus: Point):
+        """
+        Split @arc in place by a new arc of @focus. @arc is kept as the left
+        part and replaced in the tree by the breakpoint between it and the
+        new arc, whose right child is the breakpoint between the new arc
+        and the right part. Return the new arc, the right part and both
+        breakpoints, from left to right.
+        """
+        parent, parent_side = arc.parent, arc.parent_side
+        new_arc = Arc(focus)
+        right_arc = Arc(arc.focus)
+
+        # the right part takes over the breakpoint on the right of @arc
+        if arc.right_breakpoint:
+            arc.right_breakpoint.set_arcs(right_arc, arc.right_breakpoint.right_arc)
+
+        right_bp = BreakPoint(left=new_arc, right=right_arc)
+        left_bp = BreakPoint(parent, parent_side, arc, right_bp)
+        left_bp.set_arcs(arc, new_arc)
+        right_bp.set_arcs(new_arc, right_arc)
+
+        if parent:
+            setattr(parent, parent_side, left_bp)
+        else:
+            self.root = left_bp
+
+        if self.finger_bands is not None:
+            self.fingers[bisect.bisect(self.finger_bands, focus.x)] = new_arc
+
+        return new_arc, right_arc, left_bp, right_bp
 
     def delete(self, arc: Arc):
         left_bp, right_bp = self.get_surrounding_breakpoints(arc)
         setattr(arc.parent, arc.parent_side, None)
         opposite_side = "right" if arc.parent_side == "left" else "left"
-        setattr(
-            arc.parent.parent,
-            arc.parent.parent_side,
-            getattr(arc.parent, opposite_side),
-        )
+
+        # replace the parent of the arc by the sibling of the arc
+        parent = arc.parent
+        sibling = getattr(parent, opposite_side)
+        sibling.set_parent(parent.parent, parent.parent_side)
+
+        if parent.parent:
+            setattr(parent.parent, parent.parent_side, sibling)
+        else:
+            self.root = sibling
 
         removed = right_bp if opposite_side == "right" else left_bp
         updated = right_bp if opposite_side == "left" else left_bp
+        updated.set_arcs(left_bp.left_arc, right_bp.right_arc)
 
-        self.balance_and_propagate(arc.parent)
+        self.balance_and_propagate(sibling.parent or sibling)
 
         del arc
         return left_bp, right_bp, removed, updated
@@ -337,7 +404,62 @@ class BeachLine:
         if isinstance(node, Arc):
             return parent_side, parent, node
 
-        if node.get_key(y_sweep_line) > x:
+        if self.compare(node, x, y_sweep_line):
             return self.search(x, y_sweep_line, node, "left", node.left)
 
         return self.search(x, y_sweep_line, node, "right", node.right)
+
+    def compare(self, breakpoint: BreakPoint, x: float, y_sweep_line: float):
+        """
+        Whether @breakpoint is on the right of @x, counting the evaluation.
+        """
+        self.n_evaluations += 1
+        return breakpoint.get_key(y_sweep_line) > x
+
+    def search_from(self, arc: Arc, x: float, y_sweep_line: float, max_steps: int):
+        """
+        Walk from @arc through the breakpoints on its sides to the arc
+        above @x, as found by search, or return None if it is more than
+        @max_steps breakpoints away.
+        """
+        steps = 0
+
+        while arc.left_breakpoint and self.compare(
+            arc.left_breakpoint, x, y_sweep_line
+        ):
+            if steps == max_steps:
+                return
+            arc = arc.left_breakpoint.left_arc
+            steps += 1
+
+        # the breakpoint just walked through is on the right of x
+        if steps:
+            return arc
+
+        while arc.right_breakpoint and not self.compare(
+            arc.right_breakpoint, x, y_sweep_line
+        ):
+            if steps == max_steps:
+                return
+            arc = arc.right_breakpoint.right_arc
+            steps += 1
+
+        return arc
+
+    def find_arc(self, x: float, y_sweep_line: float):
+        """
+        Find the arc above @x, walking from the finger of its band in the
+        finger search mode, and descending from the root when the finger
+        is too far or has been removed since.
+        """
+        finger = None
+        if self.finger_bands is not None:
+            finger = self.fingers.get(bisect.bisect(self.finger_bands, x))
+
+        if finger and not finger.is_removed():
+            arc = self.search_from(finger, x, y_sweep_line, FINGER_STEPS)
+            if arc:
+                return arc
+
+        _, _, arc = self.search(x, y_sweep_line)
+        return arc
@@ -10,6 +10,13 @@ class BoundingBox:
         self.y_min = min([site.y for site in sites]) - offset
         self.y_max = max([site.y for site in sites]) + offset
 
+    @classmethod
+    def from_limits(cls, x_min: float, x_max: float, y_min: float, y_max: float):
+        bounding_box = cls.__new__(cls)
+        bounding_box.x_min, bounding_box.x_max = x_min, x_max
+        bounding_box.y_min, bounding_box.y_max = y_min, y_max
+        return bounding_box
+
     def get_coordinates(self):
         return [
             [self.x_min, self.y_min],
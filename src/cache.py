@@ -0,0 +1,129 @@
+import os
+import hashlib
+import threading
+import numpy as np
+
+from collections import OrderedDict
+
+from .fortune import Fortune
+from .tesselation import Tesselation
+
+
+def get_key(sites, offset: float = 0.5):
+    """
+    Hash the sorted array of the sites along with the offset of the
+    bounding box, so that the key does not depend on the order of the sites.
+    """
+    sites = np.array(
+        [(site.x, site.y) if hasattr(site, "x") else site for site in sites],
+        dtype="<f8",
+    ).reshape(-1, 2)
+    sites = sites[np.lexsort((sites[:, 0], sites[:, 1]))]
+
+    digest = hashlib.sha256(np.ascontiguousarray(sites).tobytes())
+    digest.update(np.array(offset, dtype="<f8").tobytes())
+
+    return digest.hexdigest()
+
+
+class ResultCache:
+    def __init__(self, max_bytes: int = 256 * 2**20, directory: str = None):
+        """
+        Cache the Voronoi diagrams of the site sets already computed. The
+        diagrams are stored as arrays in a LRU cache holding at most
+        @max_bytes, and also in @directory if one is given, so that they
+        survive the process.
+        """
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self.entries = OrderedDict()
+        self.n_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key: str):
+        return key in self.entries or (
+            self.directory is not None and os.path.exists(self.get_path(key))
+        )
+
+    def get_path(self, key: str):
+        return os.path.join(self.directory, f"{key}.npz")
+
+    def get(self, key: str):
+        """
+        Get the arrays of a diagram, or None if it is not cached.
+        """
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                return self.entries[key]
+
+        if self.directory is None or not os.path.exists(self.get_path(key)):
+            return
+
+        with np.load(self.get_path(key)) as data:
+            arrays = {name: data[name] for name in data.files}
+
+        # promote it to the memory
+        self.put(key, arrays, save=False)
+
+        return arrays
+
+    def put(self, key: str, arrays: dict, save: bool = True):
+        size = sum(array.nbytes for array in arrays.values())
+
+        if save and self.directory is not None:
+            # write to a temporary file first, so that a concurrent reader
+            # never finds a partial file
+            path = self.get_path(key)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as file:
+                np.savez_compressed(file, **arrays)
+            os.replace(tmp_path, path)
+
+        if size > self.max_bytes:
+            return
+
+        with self.lock:
+            if key in self.entries:
+                self.n_bytes -= sum(a.nbytes for a in self.entries.pop(key).values())
+
+            self.entries[key] = arrays
+            self.n_bytes += size
+
+            # evict the least recently used diagrams
+            while self.n_bytes > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.n_bytes -= sum(array.nbytes for array in evicted.values())
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.n_bytes = 0
+
+    def compute(self, sites: list, offset: float = 0.5):
+        """
+        Get the Voronoi diagram of some sites, running the sweep only if
+        it is not cached yet.
+        """
+        key = get_key(sites, offset)
+        arrays = self.get(key)
+
+        if arrays is None:
+            self.misses += 1
+            voronoi = Fortune(sites, offset).launch(plot=False)
+            self.put(key, voronoi.to_arrays())
+            return voronoi
+
+        self.hits += 1
+
+        # a new tesselation is built at every hit, so that the callers
+        # never share mutable objects
+        return Tesselation.from_arrays(arrays)
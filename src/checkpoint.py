@@ -0,0 +1,343 @@
+import os
+import time
+import numpy as np
+
+from .beach_line import Arc, BreakPoint, BeachLine
+from .bounding_box import BoundingBox
+from .event_queue import SiteEvent, CircleEvent, EventQueue
+from .fortune import Fortune
+from .point import Point
+from .sweep_line import SweepLine
+from .tesselation import Tesselation
+
+VERSION = 1
+
+# sides of a node relatively to its parent
+SIDES = [None, "left", "right"]
+
+# event types
+SITE, CIRCLE = 0, 1
+
+
+def _get_ids(objects: list):
+    return {id(x): i for i, x in enumerate(objects)}
+
+
+def _get_index(ids: dict, x):
+    return -1 if x is None else ids.get(id(x), -1)
+
+
+def get_state(fortune: Fortune):
+    """
+    Flatten the state of an ongoing sweep, that is its beach line, its
+    queue of events, the height of its sweep line and the partial
+    tesselation, into a dictionary of arrays where the objects refer to
+    each other by their indices (-1 standing for None).
+    """
+    site_ids = _get_ids(fortune.sites)
+    nodes = fortune.beach_line.get_nodes_ordered()
+    node_ids = _get_ids(nodes)
+    edge_ids = _get_ids(fortune.voronoi.half_edges)
+
+    # the heap is saved as is, so that the events keep their order
+    events = list(fortune.event_queue.queue.queue)
+    event_ids = _get_ids(events)
+    past_events = fortune.past_events
+
+    state = {
+        "version": np.array(VERSION),
+        "offset": np.array(fortune.offset, dtype=float),
+        # mapping between the input sites and the faces
+        "site_indices": fortune.site_indices,
+        "inverse": fortune.inverse,
+        "y_sweep_line": np.array(fortune.sweep_line.get_height(), dtype=float),
+        # beach line
+        "node_types": np.array(
+            [isinstance(node, BreakPoint) for node in nodes], dtype=np.int8
+        ),
+        "node_parents": np.array(
+            [_get_index(node_ids, node.parent) for node in nodes], dtype=np.int64
+        ),
+        "node_sides": np.array(
+            [SIDES.index(node.parent_side) for node in nodes], dtype=np.int8
+        ),
+        "node_lefts": np.array(
+            [_get_index(node_ids, node.left) for node in nodes], dtype=np.int64
+        ),
+        "node_rights": np.array(
+            [_get_index(node_ids, node.right) for node in nodes], dtype=np.int64
+        ),
+        "arc_foci": np.array(
+            [
+                site_ids[id(node.focus)] if isinstance(node, Arc) else -1
+                for node in nodes
+            ],
+            dtype=np.int64,
+        ),
+        "arc_events": np.array(
+            [_get_index(event_ids, getattr(node, "event", None)) for node in nodes],
+            dtype=np.int64,
+        ),
+        "node_half_edges": np.array(
+            [_get_index(edge_ids, getattr(node, "half_edge", None)) for node in nodes],
+            dtype=np.int64,
+        ),
+        # the neighbours of an arc are its breakpoints, and conversely
+        "node_left_neighbours": np.array(
+            [
+                _get_index(
+                    node_ids,
+                    node.left_breakpoint if isinstance(node, Arc) else node.left_arc,
+                )
+                for node in nodes
+            ],
+            dtype=np.int64,
+        ),
+        "node_right_neighbours": np.array(
+            [
+                _get_index(
+                    node_ids,
+                    node.right_breakpoint if isinstance(node, Arc) else node.right_arc,
+                )
+                for node in nodes
+            ],
+            dtype=np.int64,
+        ),
+        # queue of events
+        "event_types": np.array(
+            [isinstance(event, CircleEvent) for event in events], dtype=np.int8
+        ),
+        "event_points": np.array(
+            [(event.point.x, event.point.y) for event in events], dtype=float
+        ).reshape(-1, 2),
+        "event_sites": np.array(
+            [site_ids.get(id(event.point), -1) for event in events], dtype=np.int64
+        ),
+        "event_radii": np.array(
+            [getattr(event, "radius", 0.0) for event in events], dtype=float
+        ),
+        "event_valid": np.array([event.is_valid for event in events], dtype=bool),
+        "event_arcs": np.array(
+            [
+                (
+                    [
+                        _get_index(node_ids, arc)
+                        for arc in (event.arc, event.predecessor, event.successor)
+                    ]
+                    if isinstance(event, CircleEvent)
+                    else [-1, -1, -1]
+                )
+                for event in events
+            ],
+            dtype=np.int64,
+        ).reshape(-1, 3),
+        "past_points": np.array(
+            [(event.point.x, event.point.y) for event in past_events], dtype=float
+        ).reshape(-1, 2),
+        "past_radii": np.array([event.radius for event in past_events], dtype=float),
+        # options of the sweep
+        "validate": np.array(fortune.validate),
+        "n_evaluations": np.array(fortune.beach_line.n_evaluations),
+    }
+
+    if fortune.save_dir is not None:
+        state["save_dir"] = np.array(fortune.save_dir)
+
+    bands = fortune.beach_line.finger_bands
+    if bands is not None:
+        # the fingers left on removed arcs are dropped
+        fingers = [
+            (band, node_ids[id(arc)])
+            for band, arc in fortune.beach_line.fingers.items()
+            if id(arc) in node_ids
+        ]
+        state["finger_bands"] = np.array(bands, dtype=float)
+        state["fingers"] = np.array(
+            fingers,
+            dtype=np.int64,
+        ).reshape(-1, 2)
+
+    # partial tesselation, whose faces are in the order of the sites, and
+    # whose incomplete edges are found from the breakpoints tracing them
+    for name, array in fortune.voronoi.to_arrays().items():
+        state[f"voronoi_{name}"] = array
+
+    return state
+
+
+def set_state(state: dict):
+    """
+    Rebuild a sweep from the output of get_state, ready to go on.
+    """
+    if int(state["version"]) != VERSION:
+        raise ValueError("Unsupported checkpoint version!")
+
+    voronoi = Tesselation.from_arrays(
+        {
+            name[len("voronoi_") :]: array
+            for name, array in state.items()
+            if name.startswith("voronoi_")
+        }
+    )
+    # the sweep is restored as saved, rather than set up again by __init__
+    fortune = Fortune.__new__(Fortune)
+    fortune.sites = sites = [face.site for face in voronoi.faces]
+    fortune.offset = float(state["offset"])
+    fortune.bounding_box = BoundingBox(sites, fortune.offset)
+    fortune.voronoi = voronoi
+    fortune.save_dir = str(state["save_dir"]) if "save_dir" in state else None
+    fortune._visualizer = None
+    fortune.sweep_line = SweepLine(float(state["y_sweep_line"]))
+    fortune.event_queue = EventQueue()
+    fortune.past_events = []
+    fortune.validate = bool(state.get("validate", False))
+    fortune.trace = None
+
+    if "site_indices" in state:
+        fortune.site_indices = state["site_indices"]
+        fortune.inverse = state["inverse"]
+    else:
+        fortune.site_indices = fortune.inverse = np.arange(len(sites))
+
+    fortune.beach_line = BeachLine(
+        finger_bands=state["finger_bands"].tolist() if "finger_bands" in state else None
+    )
+    fortune.beach_line.n_evaluations = int(state.get("n_evaluations", 0))
+
+    # beach line
+    nodes = [
+        BreakPoint() if is_breakpoint else Arc(sites[focus])
+        for is_breakpoint, focus in zip(
+            state["node_types"].tolist(), state["arc_foci"].tolist()
+        )
+    ]
+    get = lambda objects, i: None if i < 0 else objects[i]
+
+    for node, parent, side, left, right, half_edge, left_n, right_n in zip(
+        nodes,
+        state["node_parents"].tolist(),
+        state["node_sides"].tolist(),
+        state["node_lefts"].tolist(),
+        state["node_rights"].tolist(),
+        state["node_half_edges"].tolist(),
+        state["node_left_neighbours"].tolist(),
+        state["node_right_neighbours"].tolist(),
+    ):
+        node.parent, node.parent_side = get(nodes, parent), SIDES[side]
+        node.left, node.right = get(nodes, left), get(nodes, right)
+
+        if isinstance(node, Arc):
+            node.left_breakpoint = get(nodes, left_n)
+            node.right_breakpoint = get(nodes, right_n)
+        else:
+            node.half_edge = get(voronoi.half_edges, half_edge)
+            node.left_arc, node.right_arc = get(nodes, left_n), get(nodes, right_n)
+
+    fortune.beach_line.root = next(
+        (node for node in nodes if node.parent is None), None
+    )
+
+    for band, node in state.get("fingers", np.zeros((0, 2), np.int64)).tolist():
+        fortune.beach_line.fingers[band] = nodes[node]
+
+    # queue of events
+    context = (
+        fortune.event_queue,
+        voronoi,
+        fortune.beach_line,
+        fortune.sweep_line,
+        fortune.bounding_box,
+    )
+    events = []
+
+    for type, point, site, radius, is_valid, arcs in zip(
+        state["event_types"].tolist(),
+        state["event_points"].tolist(),
+        state["event_sites"].tolist(),
+        state["event_radii"].tolist(),
+        state["event_valid"].tolist(),
+        state["event_arcs"].tolist(),
+    ):
+        if type == SITE:
+            event = SiteEvent(sites[site], *context, fortune.past_events)
+        else:
+            event = CircleEvent(
+                Point(point),
+                *context,
+                *(get(nodes, arc) for arc in arcs),
+                radius,
+                fortune.past_events,
+            )
+        event.is_valid = is_valid
+        events.append(event)
+
+    fortune.event_queue.queue.queue[:] = events
+
+    for node, event in zip(nodes, state["arc_events"].tolist()):
+        if isinstance(node, Arc):
+            node.event = get(events, event)
+
+    # the valid circle events already handled
+    for point, radius in zip(
+        state["past_points"].tolist(), state["past_radii"].tolist()
+    ):
+        fortune.past_events.append(
+            CircleEvent(
+                Point(point), *context, None, None, None, radius, fortune.past_events
+            )
+        )
+
+    return fortune
+
+
+def save_checkpoint(fortune: Fortune, path: str):
+    """
+    Save the state of an ongoing sweep to @path. The file is replaced
+    atomically, so that a crash while saving keeps the previous checkpoint.
+    """
+    tmp_path = f"{path}.tmp"
+
+    with open(tmp_path, "wb") as file:
+        np.savez_compressed(file, **get_state(fortune))
+
+    os.replace(tmp_path, path)
+
+
+def load_checkpoint(path: str):
+    """
+    Load a sweep saved by save_checkpoint, which gives the same diagram as
+    the uninterrupted sweep once launched.
+    """
+    with np.load(path) as data:
+        return set_state({name: data[name] for name in data.files})
+
+
+def run_with_checkpoints(
+    fortune: Fortune, path: str, interval: int = 10000, seconds: float = None
+):
+    """
+    Run the sweep, saving it to @path every @interval events, or every
+    @seconds seconds if given, and return the diagram. The checkpoint is
+    removed once the sweep is over.
+    """
+    i = 0
+    last = time.monotonic()
+
+    while fortune.step() is not None:
+        i += 1
+
+        if seconds is None and i % interval:
+            continue
+
+        if seconds is not None and time.monotonic() - last < seconds:
+            continue
+
+        save_checkpoint(fortune, path)
+        last = time.monotonic()
+
+    fortune.finish()
+
+    if os.path.exists(path):
+        os.remove(path)
+
+    return fortune.voronoi
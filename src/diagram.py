@@ -0,0 +1,126 @@
+import numpy as np
+
+from .bounding_box import BoundingBox
+from .tesselation import Tesselation
+
+
+class Diagram:
+    def __init__(self, arrays: dict, site_indices: np.ndarray = None):
+        """
+        A finished Voronoi diagram stored as the flat arrays of
+        Tesselation.to_arrays. Unlike the half-edge objects, it holds no
+        reference to the sweep that computed it and takes a fraction of
+        their memory, so that many diagrams can be kept. @site_indices maps
+        its faces to the input sites, if known.
+        """
+        self.arrays = arrays
+        self.site_indices = (
+            None if site_indices is None else np.asarray(site_indices, dtype=np.int64)
+        )
+
+    @classmethod
+    def from_tesselation(cls, voronoi: Tesselation, site_indices=None):
+        return cls(voronoi.to_arrays(), site_indices)
+
+    @classmethod
+    def from_arrays(cls, arrays: dict):
+        """
+        Rebuild a diagram from the output of to_arrays.
+        """
+        arrays = dict(arrays)
+        return cls(arrays, arrays.pop("site_indices", None))
+
+    def to_arrays(self):
+        if self.site_indices is None:
+            return dict(self.arrays)
+
+        return {**self.arrays, "site_indices": self.site_indices}
+
+    def to_tesselation(self):
+        """
+        Build the half-edge objects of the diagram.
+        """
+        return Tesselation.from_arrays(self.arrays)
+
+    def __len__(self):
+        return len(self.arrays["sites"])
+
+    @property
+    def nbytes(self):
+        return sum(array.nbytes for array in self.to_arrays().values())
+
+    @property
+    def sites(self):
+        return self.arrays["sites"]
+
+    @property
+    def vertices(self):
+        return self.arrays["vertices"]
+
+    @property
+    def bounding_box(self):
+        limits = self.arrays["bounding_box"]
+
+        if np.isnan(limits).any():
+            return
+
+        return BoundingBox.from_limits(*limits.tolist())
+
+    def get_edges(self):
+        """
+        Indices of the half-edges drawing the edges of the diagram, one per
+        pair of twins.
+        """
+        twins = self.arrays["twins"]
+        return np.flatnonzero(twins > np.arange(len(twins)))
+
+    def get_segments(self):
+        """
+        Get the edges of the diagram as a (n, 2, 2) array of segments.
+        """
+        edges = self.get_edges()
+        origins = self.arrays["origins"]
+
+        return np.stack((origins[edges], origins[self.arrays["twins"][edges]]), axis=1)
+
+    def get_edge_sites(self):
+        """
+        Get the faces on both sides of the edges as a (n, 2) array, given by
+        the indices of their sites in the input if known, -1 standing for
+        the outside of the bounding box.
+        """
+        edges = self.get_edges()
+        faces = self.arrays["incident_faces"]
+        faces = np.stack((faces[edges], faces[self.arrays["twins"][edges]]), axis=1)
+
+        if self.site_indices is None:
+            return faces
+
+        return np.append(self.site_indices, -1)[faces]
+
+    def get_cells(self):
+        """
+        Get the cells of the diagram as closed rings, counterclockwise, in a
+        (m, 2) array of points and the (n + 1,) array of the offsets of the
+        rings in it, the first point of a ring being repeated at its end.
+        The cells are convex and contain their site, so that their vertices
+        are sorted by their angle around it.
+        """
+        faces = self.arrays["incident_faces"]
+        edges = np.flatnonzero(faces >= 0)
+        faces = faces[edges]
+        origins = self.arrays["origins"][edges]
+
+        vectors = origins - self.sites[faces]
+        order = np.lexsort((np.arctan2(vectors[:, 1], vectors[:, 0]), faces))
+
+        counts = np.bincount(faces, minlength=len(self)) + 1
+        offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+
+        # leave room for the closing point after each ring
+        points = np.empty((offsets[-1], 2))
+        points[np.arange(len(order)) + faces[order]] = origins[order]
+        points[offsets[1:] - 1] = points[offsets[:-1]]
+
+        return points, offsets
@@ -5,10 +5,10 @@ from abc import ABC, abstractmethod
 
 from .bounding_box import BoundingBox
 from .point import Point
-from .beach_line import Arc, BreakPoint, BeachLine
+from .beach_line import Arc, BeachLine
 from .tesselation import Vertex, HalfEdge, Tesselation
 from .sweep_line import SweepLine
-from .geom_utils import check_clockwise
+from .geom_utils import get_circle_event
 
 
 class Event(ABC):
@@ -21,6 +21,7 @@ class Event(ABC):
         sweep_line: SweepLine,
         bounding_box: BoundingBox,
         past_events: list,
+        trace=None,
     ):
         self.point = point
         self.event_queue = event_queue
@@ -29,6 +30,7 @@ class Event(ABC):
         self.sweep_line = sweep_line
         self.bounding_box = bounding_box
         self.past_events = past_events
+        self.trace = trace
         self.is_valid = True
 
     @property
@@ -66,27 +68,14 @@ class Event(ABC):
         predecessor, arc, successor = arcs
         a, b, c = predecessor.focus, arc.focus, successor.focus
 
-        tmp_1 = 2 * ((b.x - a.x) * (c.y - b.y) - (b.y - a.y) * (c.x - b.x))
+        circle = get_circle_event(a.x, a.y, b.x, b.y, c.x, c.y)
 
-        if tmp_1 == 0:  # the points belong to one line, so no circle can be traced
+        if not circle:
             return
 
-        tmp_2 = (b.x - a.x) * (a.x + b.x) + (b.y - a.y) * (a.y + b.y)
-        tmp_3 = (c.x - a.x) * (a.x + c.x) + (c.y - a.y) * (a.y + c.y)
-
-        # center and radius of the circle
-        x = ((c.y - a.y) * tmp_2 - (b.y - a.y) * tmp_3) / tmp_1
-        y = ((b.x - a.x) * tmp_3 - (c.x - a.x) * tmp_2) / tmp_1
+        x, y, radius = circle
         point = Point((x, y))
 
-        if not self.bounding_box.contains([point]):
-            return
-
-        if not check_clockwise(a, b, c, point):
-            return
-
-        radius = np.sqrt((a.x - x) ** 2 + (a.y - y) ** 2)
-
         circle_event = CircleEvent(
             point,
             self.event_queue,
@@ -99,6 +88,7 @@ class Event(ABC):
             successor,
             radius,
             self.past_events,
+            self.trace,
         )
         self.event_queue.put(circle_event)
         arc.set_event(circle_event)
@@ -120,6 +110,7 @@ class SiteEvent(Event):
         sweep_line: SweepLine,
         bounding_box: BoundingBox,
         past_events: list,
+        trace=None,
     ):
         super().__init__(
             point,
@@ -129,6 +120,7 @@ class SiteEvent(Event):
             sweep_line,
             bounding_box,
             past_events,
+            trace,
         )
 
     @property
@@ -145,36 +137,27 @@ class SiteEvent(Event):
 
         if self.beach_line.is_empty():  # 1.
             self.beach_line.root = Arc(self.point)
+            if self.trace:
+                self.trace.record(self, created_arcs=(self.beach_line.root,))
             return
 
         # 2.
-        parent_side, parent, splitted_arc = self.beach_line.search(
-            self.point.x, y_sweep_line=self.point.y
-        )
+        splitted_arc = self.beach_line.find_arc(self.point.x, self.point.y)
 
         if isinstance(splitted_arc.event, CircleEvent):
             splitted_arc.event.remove()  # false alarm
+        splitted_arc.event = None
 
-        # 3.
-        arc_1 = Arc(splitted_arc.focus)
-        arc_2 = Arc(self.point)
-        arc_3 = Arc(splitted_arc.focus)
-        right_bp = BreakPoint(left=arc_2, right=arc_3)
-        left_bp = BreakPoint(parent, parent_side, arc_1, right_bp)
-
-        # 4.
-        filter_1 = lambda x: x.site == splitted_arc.focus
-        filter_2 = lambda x: x.site == self.point
-
-        he_1 = HalfEdge(
-            Vertex((np.inf, np.inf), breakpoint=right_bp),
-            incident_face=next(filter(filter_1, self.voronoi.faces)),
+        # 3. the splitted arc is kept as the left part
+        arc_2, arc_3, left_bp, right_bp = self.beach_line.split(
+            splitted_arc, self.point
         )
 
+        # 4. the origins of the edges are defined by the circle events ending
+        # the breakpoints, or once the sweep is over
+        he_1 = HalfEdge(None, incident_face=self.voronoi.get_face(splitted_arc.focus))
         he_2 = HalfEdge(
-            Vertex((np.inf, np.inf), breakpoint=left_bp),
-            twin=he_1,
-            incident_face=next(filter(filter_2, self.voronoi.faces)),
+            None, twin=he_1, incident_face=self.voronoi.get_face(self.point)
         )
 
         he_1.set_twin(he_2)
@@ -183,16 +166,17 @@ class SiteEvent(Event):
         right_bp.set_half_edge(he_1)
         left_bp.set_half_edge(he_2)
 
-        if parent:
-            setattr(left_bp.parent, parent_side, left_bp)
-        else:
-            self.beach_line.root = left_bp
-
         # rebalance the BeachLine
         self.beach_line.balance_and_propagate(left_bp)
 
-        # free some space
-        del splitted_arc.event, splitted_arc
+        if self.trace:
+            # the splitted arc is recorded as replaced by its left part
+            self.trace.record(
+                self,
+                removed_arcs=(splitted_arc,),
+                created_arcs=(splitted_arc, arc_2, arc_3),
+                created_edges=(he_1, he_2),
+            )
 
         # 5. look for new circle events
         self.look_for_circle_event(arc_2, reverse=False)
@@ -213,6 +197,7 @@ class CircleEvent(Event):
         successor: Arc,
         radius: float,
         past_events: list,
+        trace=None,
     ):
         super().__init__(
             point,
@@ -222,6 +207,7 @@ class CircleEvent(Event):
             sweep_line,
             bounding_box,
             past_events,
+            trace,
         )
         self.arc = arc
         self.predecessor = predecessor
@@ -243,6 +229,8 @@ class CircleEvent(Event):
     def handle(self):
         # if the event has been removed, skip
         if not self.is_valid:
+            if self.trace:
+                self.trace.record(self)
             return
 
         # record it to solve the largest circle problem
@@ -251,6 +239,12 @@ class CircleEvent(Event):
         # first, update the height of the sweep line
         self.sweep_line.set_height(self.point.y - self.radius)
 
+        # the neighbours of self.arc may have been split since the event was
+        # queued, so look for the arcs currently surrounding it
+        left_bp, right_bp = self.beach_line.get_surrounding_breakpoints(self.arc)
+        self.predecessor = left_bp.get_left_arc()
+        self.successor = right_bp.get_right_arc()
+
         # delete all circle events involving self.arc
         self.predecessor.event.remove() if self.predecessor.event else np.nan
         self.successor.event.remove() if self.successor.event else np.nan
@@ -259,23 +253,21 @@ class CircleEvent(Event):
         left_bp, right_bp, removed, updated = self.beach_line.delete(self.arc)
 
         # 2.
-        vertex = Vertex(self.point.as_array())
+        vertex = Vertex(self.point)
         self.voronoi.vertices.append(vertex)
 
+        ended_edges = (left_bp.half_edge, right_bp.half_edge)
         left_bp.half_edge.origin = vertex
         right_bp.half_edge.origin = vertex
 
-        filter_1 = lambda x: x.site == updated.get_left_arc().focus
-        filter_2 = lambda x: x.site == updated.get_right_arc().focus
-
         he_1 = HalfEdge(
             vertex,
-            incident_face=next(filter(filter_1, self.voronoi.faces)),
+            incident_face=self.voronoi.get_face(updated.get_left_arc().focus),
         )
         he_2 = HalfEdge(
-            Vertex((np.inf, np.inf), breakpoint=updated),
+            None,
             twin=he_1,
-            incident_face=next(filter(filter_2, self.voronoi.faces)),
+            incident_face=self.voronoi.get_face(updated.get_right_arc().focus),
         )
         he_1.set_twin(he_2)
         self.voronoi.half_edges.extend((he_1, he_2))
@@ -289,6 +281,14 @@ class CircleEvent(Event):
 
         updated.set_half_edge(he_2)
 
+        if self.trace:
+            self.trace.record(
+                self,
+                removed_arcs=(self.arc,),
+                created_edges=(he_1, he_2),
+                updated_edges=ended_edges,
+            )
+
         # 3. look for new circle events
         self.look_for_circle_event(updated.get_left_arc(), reverse=False)
         self.look_for_circle_event(updated.get_right_arc(), reverse=True)
@@ -307,5 +307,14 @@ class EventQueue:
     def is_empty(self):
         return self.queue.empty()
 
+    def peek(self) -> Event:
+        """
+        Get the next event without removing it from the queue.
+        """
+        return self.queue.queue[0]
+
+    def __len__(self):
+        return self.queue.qsize()
+
     def __str__(self):
         return "\n".join([str(event) for event in self.queue])
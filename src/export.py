@@ -0,0 +1,348 @@
+import datetime
+import json
+import struct
+import numpy as np
+
+from .diagram import Diagram
+from .tesselation import Tesselation
+
+# features per chunk of output
+CHUNK_SIZE = 65536
+
+GEOMETRIES = ("cells", "edges")
+
+# little-endian WKB headers of the polygons of one ring and of the linestrings
+WKB_POLYGON, WKB_LINESTRING = 3, 2
+WKB_HEADERS = {
+    "cells": np.dtype(
+        [("order", "u1"), ("type", "<u4"), ("n_rings", "<u4"), ("n_points", "<u4")]
+    ),
+    "edges": np.dtype([("order", "u1"), ("type", "<u4"), ("n_points", "<u4")]),
+}
+
+# records of the shapefiles, of a single part, the header of the record
+# being big-endian and its content little-endian
+SHP_POLYGON, SHP_POLYLINE = 5, 3
+SHP_RECORD = np.dtype(
+    [
+        ("number", ">i4"),
+        ("length", ">i4"),
+        ("type", "<i4"),
+        ("box", "<f8", (4,)),
+        ("n_parts", "<i4"),
+        ("n_points", "<i4"),
+        ("part", "<i4"),
+    ]
+)
+SHP_HEADER_SIZE = 100
+SHX_RECORD = np.dtype([("offset", ">i4"), ("length", ">i4")])
+
+# numeric fields of the dBase tables, wide enough for any site index
+DBF_FIELD_WIDTH = 11
+
+FEATURES = {
+    "cells": '{"type":"Feature","geometry":{"type":"Polygon","coordinates":[[[%s]]]},'
+    '"properties":{"site":%d}}',
+    "edges": '{"type":"Feature","geometry":{"type":"LineString","coordinates":[[%s]]},'
+    '"properties":{"right_site":%d,"left_site":%d}}',
+}
+_encode = json.JSONEncoder(separators=(",", ":")).encode
+
+
+def get_features(diagram, geometry: str = "cells"):
+    """
+    Get the cells or the edges of a diagram, as the (m, 2) array of the
+    points of the features, the (n + 1,) array of their offsets in it, and
+    a dictionary of the arrays of their attributes: the index of the site
+    of a cell, and the indices of the sites on the right and on the left of
+    an edge going from its first point to its second one, -1 standing for
+    the outside of the bounding box. The indices are the ones of the sites
+    in the input when the diagram knows them.
+    """
+    if isinstance(diagram, Tesselation):
+        diagram = Diagram.from_tesselation(diagram)
+
+    if geometry == "cells":
+        points, offsets = diagram.get_cells()
+        sites = diagram.site_indices
+        if sites is None:
+            sites = np.arange(len(diagram))
+
+        return points, offsets, {"site": sites}
+
+    if geometry == "edges":
+        segments = diagram.get_segments()
+        sites = diagram.get_edge_sites()
+
+        return (
+            segments.reshape(-1, 2),
+            2 * np.arange(len(segments) + 1),
+            {"right_site": sites[:, 0], "left_site": sites[:, 1]},
+        )
+
+    raise ValueError(f"Unknown geometry {geometry!r}, expected one of {GEOMETRIES}!")
+
+
+def _get_chunks(n: int, chunk_size: int):
+    for start in range(0, n, chunk_size):
+        yield start, min(start + chunk_size, n)
+
+
+def _reverse_rings(points: np.ndarray, offsets: np.ndarray):
+    counts = np.diff(offsets)
+    positions = np.arange(len(points))
+    starts = np.repeat(offsets[:-1], counts)
+    ends = np.repeat(offsets[1:], counts)
+
+    return points[starts + ends - 1 - positions]
+
+
+def pack_records(headers: np.ndarray, points: np.ndarray, offsets: np.ndarray):
+    """
+    Pack records made of a fixed-size header, from the structured array
+    @headers, followed by their points as little-endian doubles, the
+    points of record i being points[offsets[i]:offsets[i + 1]]. Return the
+    contiguous buffer of the records and the (n + 1,) array of their
+    offsets in it.
+    """
+    size = headers.dtype.itemsize
+    offsets = offsets - offsets[0]
+    counts = np.diff(offsets)
+
+    starts = np.zeros(len(counts) + 1, dtype=np.int64)
+    np.cumsum(size + 16 * counts, out=starts[1:])
+
+    buffer = np.empty(starts[-1], dtype=np.uint8)
+    buffer[starts[:-1, None] + np.arange(size)] = headers.view(np.uint8).reshape(
+        -1, size
+    )
+
+    # the points of a record follow its header
+    positions = np.repeat(starts[:-1] + size - 16 * offsets[:-1], counts)
+    positions += 16 * np.arange(len(points))
+    buffer[positions[:, None] + np.arange(16)] = (
+        np.ascontiguousarray(points, dtype="<f8").view(np.uint8).reshape(-1, 16)
+    )
+
+    return buffer, starts
+
+
+def get_wkb(points: np.ndarray, offsets: np.ndarray, geometry: str = "cells"):
+    """
+    Encode features given as by get_features into little-endian WKB,
+    polygons for the cells and linestrings for the edges. Return the
+    contiguous buffer of the records and the offsets of the records in it.
+    """
+    headers = np.zeros(len(offsets) - 1, dtype=WKB_HEADERS[geometry])
+    headers["order"] = 1
+    headers["n_points"] = np.diff(offsets)
+
+    if geometry == "cells":
+        headers["type"] = WKB_POLYGON
+        headers["n_rings"] = 1
+    else:
+        headers["type"] = WKB_LINESTRING
+
+    return pack_records(headers, points, offsets)
+
+
+def iter_wkb(diagram, geometry: str = "cells", chunk_size: int = CHUNK_SIZE):
+    """
+    Encode the cells or the edges of a diagram into WKB by chunks of
+    @chunk_size features. Yield the buffer of each chunk, the offsets of
+    its records and the dictionary of their attributes.
+    """
+    points, offsets, attributes = get_features(diagram, geometry)
+
+    for start, stop in _get_chunks(len(offsets) - 1, chunk_size):
+        bounds = offsets[start : stop + 1]
+        buffer, starts = get_wkb(points[bounds[0] : bounds[-1]], bounds, geometry)
+
+        yield buffer, starts, {
+            name: values[start:stop] for name, values in attributes.items()
+        }
+
+
+def to_wkb(diagram, geometry: str = "cells"):
+    """
+    Encode the cells or the edges of a diagram into a single WKB buffer.
+    Return the buffer, the offsets of its records and their attributes,
+    the record of feature i being buffer[offsets[i]:offsets[i + 1]].
+    """
+    points, offsets, attributes = get_features(diagram, geometry)
+    return (*get_wkb(points, offsets, geometry), attributes)
+
+
+def write_geojson(
+    diagram,
+    file,
+    geometry: str = "cells",
+    chunk_size: int = CHUNK_SIZE,
+    sequence: bool = False,
+):
+    """
+    Write the cells or the edges of a diagram as GeoJSON features, with the
+    indices of their sites as properties, one chunk of @chunk_size features
+    at a time. The features form a FeatureCollection, or a GeoJSON text
+    sequence (RFC 8142) if @sequence. @file is either a path or a binary
+    file object.
+    """
+    points, offsets, attributes = get_features(diagram, geometry)
+    template = FEATURES[geometry]
+
+    owns_file = isinstance(file, str)
+    file = open(file, "wb") if owns_file else file
+
+    try:
+        if not sequence:
+            file.write(b'{"type":"FeatureCollection","features":[\n')
+
+        for start, stop in _get_chunks(len(offsets) - 1, chunk_size):
+            # the numbers of the chunk are encoded at once, from a flat list
+            # since a list per point would have the garbage collector walk
+            # through all the objects alive, the half-edges included
+            numbers = _encode(points[offsets[start] : offsets[stop]].ravel().tolist())
+            numbers = numbers[1:-1].split(",")
+            coordinates = list(map(",".join, zip(numbers[::2], numbers[1::2])))
+
+            bounds = (offsets[start : stop + 1] - offsets[start]).tolist()
+            rows = zip(*(values[start:stop].tolist() for values in attributes.values()))
+
+            features = [
+                template % ("],[".join(coordinates[i:j]), *row)
+                for i, j, row in zip(bounds[:-1], bounds[1:], rows)
+            ]
+
+            if sequence:
+                text = "".join(f"\x1e{feature}\n" for feature in features)
+            else:
+                text = ("" if start == 0 else ",\n") + ",\n".join(features)
+
+            file.write(text.encode())
+
+        if not sequence:
+            file.write(b"\n]}\n")
+    finally:
+        if owns_file:
+            file.close()
+        else:
+            file.flush()
+
+
+def get_shp_header(length: int, shape_type: int, box: tuple):
+    """
+    Header of a .shp or .shx file of @length bytes.
+    """
+    return struct.pack(">7i", 9994, 0, 0, 0, 0, 0, length // 2) + struct.pack(
+        "<2i8d", 1000, shape_type, *box, 0, 0, 0, 0
+    )
+
+
+def get_dbf_header(n_records: int, fields: list):
+    """
+    Header of a dBase III table of @n_records records, whose @fields are
+    all integers.
+    """
+    today = datetime.date.today()
+    header = struct.pack(
+        "<4BIHH20x",
+        3,
+        today.year - 1900,
+        today.month,
+        today.day,
+        n_records,
+        33 + 32 * len(fields),
+        1 + DBF_FIELD_WIDTH * len(fields),
+    )
+
+    for name in fields:
+        header += struct.pack(
+            "<11sc4xBB14x", name.upper().encode(), b"N", DBF_FIELD_WIDTH, 0
+        )
+
+    return header + b"\r"
+
+
+def get_dbf_records(columns: list):
+    """
+    Records of a dBase III table, from the arrays of integers of its
+    columns, right-justified in their fields.
+    """
+    n = len(columns[0]) if columns else 0
+    records = np.full((n, 1 + DBF_FIELD_WIDTH * len(columns)), ord(" "), np.uint8)
+
+    for i, values in enumerate(columns):
+        text = np.char.rjust(values.astype(f"S{DBF_FIELD_WIDTH}"), DBF_FIELD_WIDTH)
+        start = 1 + DBF_FIELD_WIDTH * i
+        records[:, start : start + DBF_FIELD_WIDTH] = text.view(np.uint8).reshape(
+            n, DBF_FIELD_WIDTH
+        )
+
+    return records
+
+
+def write_shapefile(
+    diagram, path: str, geometry: str = "cells", chunk_size: int = CHUNK_SIZE
+):
+    """
+    Write the cells or the edges of a diagram as an ESRI shapefile of
+    polygons or polylines, that is the .shp, .shx and .dbf files next to
+    @path, the table holding the indices of the sites of the features. The
+    records are written one chunk of @chunk_size features at a time.
+    """
+    base = path[:-4] if path.lower().endswith(".shp") else path
+    points, offsets, attributes = get_features(diagram, geometry)
+
+    # the outer rings of the shapefiles are clockwise
+    if geometry == "cells":
+        points = _reverse_rings(points, offsets)
+
+    shape_type = SHP_POLYGON if geometry == "cells" else SHP_POLYLINE
+    n = len(offsets) - 1
+    counts = np.diff(offsets)
+
+    # the lengths of the records, in 16-bit words, and their offsets
+    lengths = (SHP_RECORD.itemsize - 8 + 16 * counts) // 2
+    starts = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(lengths + 4, out=starts[1:])
+    starts += SHP_HEADER_SIZE // 2
+
+    box = (*points.min(axis=0), *points.max(axis=0)) if len(points) else (0, 0, 0, 0)
+    columns = list(attributes.values())
+
+    with open(f"{base}.shp", "wb") as shp, open(f"{base}.shx", "wb") as shx, open(
+        f"{base}.dbf", "wb"
+    ) as dbf:
+        shp.write(get_shp_header(2 * int(starts[-1]), shape_type, box))
+        shx.write(
+            get_shp_header(SHP_HEADER_SIZE + SHX_RECORD.itemsize * n, shape_type, box)
+        )
+        dbf.write(get_dbf_header(n, list(attributes)))
+
+        for start, stop in _get_chunks(n, chunk_size):
+            bounds = offsets[start : stop + 1]
+            chunk = points[bounds[0] : bounds[-1]]
+            local = bounds[:-1] - bounds[0]
+
+            headers = np.zeros(stop - start, dtype=SHP_RECORD)
+            headers["number"] = np.arange(start + 1, stop + 1)
+            headers["length"] = lengths[start:stop]
+            headers["type"] = shape_type
+            headers["n_parts"] = 1
+            headers["n_points"] = counts[start:stop]
+
+            for i, reduce in enumerate((np.minimum, np.maximum)):
+                headers["box"][:, 2 * i : 2 * i + 2] = reduce.reduceat(chunk, local)
+
+            shp.write(pack_records(headers, chunk, bounds)[0].tobytes())
+
+            index = np.empty(stop - start, dtype=SHX_RECORD)
+            index["offset"] = starts[start:stop]
+            index["length"] = lengths[start:stop]
+            shx.write(index.tobytes())
+
+            dbf.write(
+                get_dbf_records([values[start:stop] for values in columns]).tobytes()
+            )
+
+        dbf.write(b"\x1a")
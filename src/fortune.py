@@ -1,31 +1,80 @@
+import numpy as np
+
 from .point import Point
 from .bounding_box import BoundingBox
 from .beach_line import BeachLine
 from .event_queue import SiteEvent, CircleEvent, EventQueue
-from .tesselation import Tesselation, Face
-from .visualizer import Visualizer
+from .tesselation import Tesselation, Face, HalfEdge
 from .sweep_line import SweepLine
 from .geom_utils import finish_edges
+from .diagram import Diagram
+from .validation import check_sweep, check_diagram
+
+
+def normalize_sites(sites):
+    """
+    Sort some sites by y, then by x, and remove the duplicates. Return the
+    (m, 2) array of the distinct sites, the indices of their first copy in
+    @sites, and for each of @sites the index of the distinct site it is.
+    """
+    sites = np.asarray(sites, dtype=float).reshape(-1, 2)
+    order = np.lexsort((sites[:, 0], sites[:, 1]))
+    sorted_sites = sites[order]
+
+    first = np.ones(len(sites), dtype=bool)
+    first[1:] = (sorted_sites[1:] != sorted_sites[:-1]).any(axis=1)
+
+    inverse = np.empty(len(sites), dtype=np.int64)
+    inverse[order] = np.cumsum(first) - 1
+
+    return sorted_sites[first], order[first], inverse
 
 
 class Fortune:
-    def __init__(self, sites: list):
-        self.sites = [Point(site) for site in sites]
-        self.sites.sort(key=lambda p: p.y)
+    def __init__(
+        self,
+        sites: list,
+        offset: float = 0.5,
+        trace=None,
+        save_dir: str = "images",
+        validate: bool = False,
+        finger_search: bool = False,
+    ):
+        # the faces of the diagram follow the distinct sites sorted by y then
+        # by x: @site_indices maps them to the input, and @inverse maps the
+        # input to them
+        sites, self.site_indices, self.inverse = normalize_sites(sites)
+
+        # Python floats are faster than NumPy scalars in the sweep
+        self.sites = [Point(site) for site in sites.tolist()]
 
         # create a bounding box around the sites
-        self.bounding_box = BoundingBox(self.sites, 0.5)
+        self.offset = offset
+        self.bounding_box = BoundingBox(self.sites, offset)
+
+        # create the beach line, searched from the arcs of the last sites if
+        # @finger_search, in about sqrt(n) bands holding as many sites each,
+        # which is about the number of arcs of the beach line
+        bands = None
+        if finger_search:
+            n_bands = max(int(np.sqrt(len(sites))), 1)
+            bands = np.quantile(sites[:, 0], np.arange(1, n_bands) / n_bands)
+            bands = bands.tolist()
 
-        # create the beach line
-        self.beach_line = BeachLine()
+        self.beach_line = BeachLine(finger_bands=bands)
 
         # create the data structure to store the Voronoi diagram
         self.voronoi = Tesselation()
         self.voronoi.faces = [Face(site) for site in self.sites]
 
-        # create an object that handles the visualisation
-        self.visualizer = Visualizer(self.voronoi, self.bounding_box)
-        self.sweep_line = SweepLine(self.visualizer.y_max)
+        # the object that handles the visualisation is created on first use,
+        # and saves the figures to @save_dir
+        self.save_dir = save_dir
+        self._visualizer = None
+        # the sweep line starts at the top of the canvas of the visualizer
+        self.sweep_line = SweepLine(
+            min(self.bounding_box.x_max, self.bounding_box.y_max) + 2
+        )
 
         # create the queue of events
         self.event_queue = EventQueue()
@@ -33,8 +82,26 @@ class Fortune:
         # records of valid circle events
         self.past_events = []
 
+        # whether to check the invariants of the sweep after each event, and
+        # the diagram against brute force at the end, which is slow
+        self.validate = validate
+
+        # optional recorder of the handled events
+        self.trace = trace
+        if trace:
+            trace.start(self.sites, self.bounding_box)
+
+        # the sites sharing the highest y-coordinate are on the sweep line
+        # together, so that the beach line starts with all of them
+        first = len(self.sites) - 1
+        while first > 0 and self.sites[first - 1].y == self.sites[-1].y:
+            first -= 1
+
+        if self.sites:
+            self.initialize(self.sites[first:])
+
         # enqueue the "site events" to come
-        for site in self.sites:
+        for site in self.sites[:first]:
             self.event_queue.put(
                 SiteEvent(
                     site,
@@ -44,29 +111,141 @@ class Fortune:
                     self.sweep_line,
                     self.bounding_box,
                     self.past_events,
+                    self.trace,
                 )
             )
 
-    def launch(self):
-        i = 1
-        while not self.event_queue.is_empty():
-            event = self.event_queue.get()
-            event.handle()
-
-            self.visualizer.plot(
-                edges=self.voronoi.half_edges,
-                vertices=self.voronoi.vertices,
-                sites=self.sites,
-                arcs=self.beach_line.get_arcs_ordered(),
-                y_sweep_line=self.sweep_line.get_height(),
-                event=event,
-                fig_name=f"step_{i}",
+    def initialize(self, sites: list):
+        """
+        Set up the beach line for the first @sites, sharing the same
+        y-coordinate and sorted by x. Their arcs are split by breakpoints
+        tracing vertical lines, whose upper halves are not traced by any
+        breakpoint. Inserting them through site events would instead put
+        each of them into the last arc and rebalance the whole tree.
+        """
+        self.sweep_line.set_height(sites[0].y)
+        arcs, breakpoints = self.beach_line.initialize(sites)
+
+        for i, (site, arc) in enumerate(zip(sites, arcs)):
+            edges = ()
+
+            if i > 0:
+                he_1 = HalfEdge(None, incident_face=self.voronoi.get_face(site))
+                he_2 = HalfEdge(
+                    None,
+                    twin=he_1,
+                    incident_face=self.voronoi.get_face(sites[i - 1]),
+                )
+                he_1.set_twin(he_2)
+                self.voronoi.half_edges.extend(edges := (he_1, he_2))
+                breakpoints[i - 1].set_half_edge(he_1)
+
+            if self.trace:
+                # recorded as the site events the sites would have been
+                event = SiteEvent(
+                    site,
+                    self.event_queue,
+                    self.voronoi,
+                    self.beach_line,
+                    self.sweep_line,
+                    self.bounding_box,
+                    self.past_events,
+                    self.trace,
+                )
+                self.trace.record(event, created_arcs=(arc,), created_edges=edges)
+
+    @property
+    def visualizer(self):
+        if self._visualizer is None:
+            # Matplotlib is only loaded when something is plotted
+            from .visualizer import Visualizer
+
+            self._visualizer = Visualizer(
+                self.voronoi, self.bounding_box, save_dir=self.save_dir
             )
 
+        return self._visualizer
+
+    def step(self):
+        """
+        Handle the next event of the queue and return it, or None once the
+        queue is exhausted.
+        """
+        if self.event_queue.is_empty():
+            return
+
+        event = self.event_queue.get()
+        event.handle()
+
+        if self.validate:
+            check_sweep(self, event)
+
+        return event
+
+    def finish(self):
+        """
+        Define the incomplete edges once the sweep is over.
+        """
+        # the box the edges are clipped to contains all the vertices, so that
+        # the diagram is kept whole
+        bounding_box = BoundingBox(self.sites + self.voronoi.vertices, self.offset)
+        finish_edges(self.voronoi.half_edges, bounding_box)
+        self.voronoi.close(bounding_box)
+
+        if self.validate:
+            check_diagram(self.voronoi)
+
+        if self.trace:
+            self.trace.finish(self.voronoi.half_edges)
+
+    def compact(self):
+        """
+        Convert the diagram of the finished sweep into a standalone Diagram,
+        and drop the structures of the sweep: the beach line, the queue and
+        the past events, which refer to each other and to the tesselation.
+        The Fortune object then only keeps its sites and their mapping to
+        the input.
+        """
+        if self.voronoi is None or self.voronoi.bounding_box is None:
+            raise ValueError("The sweep is not finished, or already compacted!")
+
+        diagram = Diagram.from_tesselation(self.voronoi, self.site_indices)
+
+        self.voronoi = None
+        self.beach_line = None
+        self.event_queue = None
+        self.past_events = None
+        self._visualizer = None
+        self.trace = None
+
+        return diagram
+
+    def launch(self, plot: bool = True, compact: bool = False):
+        """
+        Run the whole sweep and return the Voronoi diagram, plotting every
+        step if @plot. If @compact, the diagram is returned as a Diagram and
+        the sweep is dropped, see compact.
+        """
+        i = 1
+        while (event := self.step()) is not None:
+            if plot:
+                self.visualizer.plot(
+                    edges=self.voronoi.half_edges,
+                    vertices=self.voronoi.vertices,
+                    sites=self.sites,
+                    arcs=self.beach_line.get_arcs_ordered(),
+                    y_sweep_line=self.sweep_line.get_height(),
+                    event=event,
+                    fig_name=f"step_{i}",
+                )
+
             i += 1
 
         # define incomplete edges
-        finish_edges(self.voronoi.half_edges, self.bounding_box)
+        self.finish()
+
+        if not plot:
+            return self.compact() if compact else self.voronoi
 
         # plot final result
         self.visualizer.plot(
@@ -100,3 +279,5 @@ class Fortune:
             event=max(self.past_events, key=lambda x: x.radius),
             fig_name=f"largest_circle_3",
         )
+
+        return self.compact() if compact else self.voronoi
@@ -1,102 +1,341 @@
+import math
 import numpy as np
 
+from fractions import Fraction
+
+from .jit import jit
 from .point import Point
 from .tesselation import Vertex
 
-OFFSET = 10
+# relative error bound of the orientation determinant computed with doubles,
+# (3 + 16 * eps) * eps with eps = 2 ** -53 (Shewchuk, 1997)
+ORIENTATION_ERROR = 3.3306690738754716e-16
+
+
+@jit
+def get_parabola_y(x, focus_x, focus_y, y_sweep_line):
+    # squares are written as products, which are exactly rounded in every
+    # backend, unlike x ** 2 which may go through pow
+    return (
+        x * x
+        - 2 * focus_x * x
+        + focus_x * focus_x
+        + focus_y * focus_y
+        - y_sweep_line * y_sweep_line
+    ) / (2 * (focus_y - y_sweep_line))
 
 
 def get_y_parabola(x: float, focus: Point, y_sweep_line: float):
-    return list(
-        (x**2 - 2 * focus.x * x + focus.x**2 + focus.y**2 - y_sweep_line**2) /
-        (2 * (focus.y - y_sweep_line)))
+    # NumPy is faster than the compiled kernel on a whole array
+    return list(get_parabola_y.py_func(x, focus.x, focus.y, y_sweep_line))
+
+
+@jit
+def get_intersection_coords(i_x, i_y, j_x, j_y, s, max_y):
+    """
+    Coordinates of the intersection of the parabolas of foci i (on the
+    left) and j (on the right) for the sweep line at height s.
+    """
+    p_x, p_y = i_x, i_y
+    u = 2 * (i_y - s)
+    v = 2 * (j_y - s)
+
+    if i_y == j_y:
+        x = (i_x + j_x) / 2
+
+        if j_x < i_x:
+            return x, max_y
+
+    elif i_y == s:
+        x = i_x
+        p_x, p_y = j_x, j_y
+
+    elif j_y == s:
+        x = j_x
+
+    elif u == v:
+        # the sweep line is so far below that the heights of the foci are
+        # the same in floating point
+        x = (i_x + j_x) / 2
+
+    else:
+        # the discriminant can only be negative because of rounding errors
+        discriminant = (
+            v
+            * (i_x * i_x * u - 2 * i_x * j_x * u + i_y * i_y * (u - v) + j_x * j_x * u)
+            + j_y * j_y * u * (v - u)
+            + s * s * (u - v) * (u - v)
+        )
+        x = -(math.sqrt(max(discriminant, 0.0)) + i_x * v - j_x * u) / (u - v)
+
+    # evaluate the parabola of p
+    u = 2 * (p_y - s)
+
+    if u == 0:
+        return x, math.inf
+
+    return x, 1 / u * (x * x - 2 * p_x * x + p_x * p_x + p_y * p_y - s * s)
 
 
 def get_intersection(breakpoint, y_sweep_line: float, max_y: float = None):
     i = breakpoint.get_left_arc().focus
     j = breakpoint.get_right_arc().focus
-    result = Point((np.inf, np.inf))
 
-    s = y_sweep_line
-    p = i
-    u = 2 * (i.y - s)
-    v = 2 * (j.y - s)
+    return Point(
+        get_intersection_coords(i.x, i.y, j.x, j.y, y_sweep_line, max_y or math.inf)
+    )
 
-    if i.y == j.y:
-        result.x = (i.x + j.x) / 2
 
-        if j.x < i.x:
-            result.y = max_y or float("inf")
-            return result
+@jit
+def get_orientation_filter(a_x, a_y, b_x, b_y, c_x, c_y):
+    """
+    Sign of the floating-point orientation determinant, or 0 when it does
+    not exceed its worst-case rounding error.
+    """
+    left = (b_x - a_x) * (c_y - a_y)
+    right = (b_y - a_y) * (c_x - a_x)
+    det = left - right
+    bound = ORIENTATION_ERROR * (abs(left) + abs(right))
 
-    elif i.y == s:
-        result.x = i.x
-        p = j
+    if det > bound:
+        return 1
 
-    elif j.y == s:
-        result.x = j.x
+    if -det > bound:
+        return -1
 
-    else:
-        x = -(np.sqrt(v * (i.x**2 * u - 2 * i.x * j.x * u + i.y**2 *
-                           (u - v) + j.x**2 * u) + j.y**2 * u *
-                      (v - u) + s**2 *
-                      (u - v)**2) + i.x * v - j.x * u) / (u - v)
-        result.x = x
+    return 0
 
-    i.x = p.x
-    i.y = p.y
-    x = result.x
-    u = 2 * (i.y - s)
 
-    if u == 0:
-        result.y = float("inf")
-        return result
+def get_orientation(a_x, a_y, b_x, b_y, c_x, c_y):
+    """
+    Sign of the cross product (b - a) x (c - a), that is 1 if a, b and c
+    turn counterclockwise, -1 if they turn clockwise and 0 if they are
+    collinear. The floating-point determinant is trusted when it exceeds
+    its worst-case rounding error, otherwise it is computed exactly.
+    """
+    sign = get_orientation_filter(a_x, a_y, b_x, b_y, c_x, c_y)
+
+    if sign:
+        return sign
 
-    result.y = 1 / u * (x**2 - 2 * i.x * x + i.x**2 + i.y**2 - s**2)
+    a_x, a_y, b_x, b_y, c_x, c_y = map(Fraction, (a_x, a_y, b_x, b_y, c_x, c_y))
+    det = (b_x - a_x) * (c_y - a_y) - (b_y - a_y) * (c_x - a_x)
 
-    return result
+    return (det > 0) - (det < 0)
 
 
-def calculate_angle(point, center):
-    dx = point.x - center.x
-    dy = point.y - center.y
-    return np.math.degrees(np.math.atan2(dy, dx)) % 360
+def orientation(a: Point, b: Point, c: Point):
+    return get_orientation(a.x, a.y, b.x, b.y, c.x, c.y)
 
 
-def check_clockwise(x, y, z, center):
-    angle_1 = calculate_angle(x, center)
-    angle_2 = calculate_angle(y, center)
-    angle_3 = calculate_angle(z, center)
+def check_clockwise(x: Point, y: Point, z: Point):
+    return orientation(x, y, z) < 0
 
-    counter_clockwise = (angle_3 - angle_1) % 360 > (angle_3 - angle_2) % 360
 
-    if counter_clockwise:
-        return False
+@jit
+def get_circumcircle(a_x, a_y, b_x, b_y, c_x, c_y):
+    """
+    Center and radius of the circle through a, b and c, NaN if they are
+    (too close to being) collinear.
+    """
+    tmp_1 = 2 * ((b_x - a_x) * (c_y - b_y) - (b_y - a_y) * (c_x - b_x))
 
-    return True
+    if tmp_1 == 0:
+        return math.nan, math.nan, math.nan
 
+    tmp_2 = (b_x - a_x) * (a_x + b_x) + (b_y - a_y) * (a_y + b_y)
+    tmp_3 = (c_x - a_x) * (a_x + c_x) + (c_y - a_y) * (a_y + c_y)
 
-def _finish_edge(edge, bounding_box):
-    starts = edge.get_origin().is_defined()
-    ends = edge.twin.get_origin().is_defined()
+    x = ((c_y - a_y) * tmp_2 - (b_y - a_y) * tmp_3) / tmp_1
+    y = ((b_x - a_x) * tmp_3 - (c_x - a_x) * tmp_2) / tmp_1
+    radius = math.sqrt((a_x - x) * (a_x - x) + (a_y - y) * (a_y - y))
 
-    if starts and ends:
+    return x, y, radius
+
+
+def get_circle_event(a_x, a_y, b_x, b_y, c_x, c_y):
+    """
+    Center and radius of the circle through the foci of three consecutive
+    arcs, or None if the two breakpoints between them do not converge,
+    i.e. if the foci do not turn clockwise.
+    """
+    if get_orientation(a_x, a_y, b_x, b_y, c_x, c_y) >= 0:
         return
 
-    breakpoint = edge.get_origin().get_breakpoint()
-    edge.set_origin(Vertex(breakpoint.get_coords(
-        bounding_box.y_min - OFFSET))) if not starts and breakpoint else np.nan
+    x, y, radius = get_circumcircle(a_x, a_y, b_x, b_y, c_x, c_y)
+
+    if math.isnan(x):  # too close to a line to trace a circle
+        return
+
+    return x, y, radius
+
+
+def get_circle_events(a: np.ndarray, b: np.ndarray, c: np.ndarray):
+    """
+    Batched version of get_circle_event for (n, 2) arrays of foci. Return
+    a mask of the triples giving a circle event, the (n, 2) array of the
+    centers and the (n,) array of the radii, both being NaN where the mask
+    is False.
+    """
+    a_x, a_y = a[:, 0], a[:, 1]
+    b_x, b_y = b[:, 0], b[:, 1]
+    c_x, c_y = c[:, 0], c[:, 1]
+
+    left = (b_x - a_x) * (c_y - a_y)
+    right = (b_y - a_y) * (c_x - a_x)
+    det = left - right
+    bound = ORIENTATION_ERROR * (np.abs(left) + np.abs(right))
+    mask = -det > bound
+
+    # settle the uncertain signs with exact arithmetic
+    for i in np.flatnonzero(np.abs(det) <= bound):
+        mask[i] = get_orientation(a_x[i], a_y[i], b_x[i], b_y[i], c_x[i], c_y[i]) < 0
+
+    tmp_1 = 2 * ((b_x - a_x) * (c_y - b_y) - (b_y - a_y) * (c_x - b_x))
+    mask &= tmp_1 != 0
+    tmp_1 = np.where(mask, tmp_1, np.nan)
+
+    tmp_2 = (b_x - a_x) * (a_x + b_x) + (b_y - a_y) * (a_y + b_y)
+    tmp_3 = (c_x - a_x) * (a_x + c_x) + (c_y - a_y) * (a_y + c_y)
 
-    breakpoint = edge.twin.get_origin().get_breakpoint()
-    edge.set_origin(Vertex(
-        breakpoint.get_coords(bounding_box.y_min -
-                              OFFSET))) if not ends and breakpoint else np.nan
+    x = ((c_y - a_y) * tmp_2 - (b_y - a_y) * tmp_3) / tmp_1
+    y = ((b_x - a_x) * tmp_3 - (c_x - a_x) * tmp_2) / tmp_1
+    radii = np.sqrt((a_x - x) ** 2 + (a_y - y) ** 2)
 
-    return
+    return mask, np.stack((x, y), axis=1), radii
+
+
+def get_direction(breakpoint):
+    """
+    Direction in which a breakpoint moves as the sweep line goes down,
+    along the bisector of the foci of its arcs.
+    """
+    left = breakpoint.get_left_arc().focus
+    right = breakpoint.get_right_arc().focus
+    return right.y - left.y, left.x - right.x
+
+
+def get_polygon(boundary):
+    """
+    Vertices of a bounding box or of a convex polygon, counterclockwise, as
+    a (m, 2) array.
+    """
+    if hasattr(boundary, "get_coordinates"):
+        return np.array(boundary.get_coordinates(), dtype=float)
+
+    polygon = np.asarray(boundary, dtype=float).reshape(-1, 2)
+    x, y = polygon[:, 0], polygon[:, 1]
+
+    if np.dot(x, np.roll(y, -1)) - np.dot(y, np.roll(x, -1)) < 0:
+        polygon = polygon[::-1]
+
+    return polygon
+
+
+def get_clipping_bounds(starts: np.ndarray, directions: np.ndarray, boundary):
+    """
+    Range [t_in, t_out] of the parameters t for which starts + t * directions
+    lies in a bounding box (Liang-Barsky) or in a convex polygon (Cyrus-Beck),
+    for (n, 2) arrays of lines, along with the index of the side the lines
+    leave through.
+    """
+    if hasattr(boundary, "x_min"):
+        # the sides of a box are x <= x_max, -x <= -x_min, y <= y_max...
+        normals = np.array([(1, 0), (-1, 0), (0, 1), (0, -1)], dtype=float)
+        offsets = np.array(
+            [boundary.x_max, -boundary.x_min, boundary.y_max, -boundary.y_min]
+        )
+    else:
+        polygon = get_polygon(boundary)
+        sides = np.roll(polygon, -1, axis=0) - polygon
+        normals = np.stack((sides[:, 1], -sides[:, 0]), axis=1)
+        offsets = np.einsum("ij,ij->i", normals, polygon)
+
+    # n . (start + t * direction) <= offset for every side
+    p = directions @ normals.T
+    q = offsets - starts @ normals.T
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = q / p
+
+    t_out = np.where(p > 0, t, np.inf)
+    t_in = np.where(p < 0, t, -np.inf)
+    sides = t_out.argmin(axis=1)
+
+    # parallel lines outside of a side never enter the polygon
+    outside = ((p == 0) & (q < 0)).any(axis=1)
+    t_in = np.where(outside, np.inf, t_in.max(axis=1))
+
+    return t_in, t_out.min(axis=1), sides
+
+
+def clip_rays(starts: np.ndarray, directions: np.ndarray, boundary):
+    """
+    Points where the (n, 2) arrays of rays, starting inside a bounding box
+    or a convex polygon, leave it. For a box, the coordinate of the side
+    the rays leave through is set exactly.
+    """
+    _, t_out, sides = get_clipping_bounds(starts, directions, boundary)
+    ends = starts + t_out[:, None] * directions
+
+    if hasattr(boundary, "x_min"):
+        limits = np.array(
+            [boundary.x_max, boundary.x_min, boundary.y_max, boundary.y_min]
+        )
+        rows = np.arange(len(ends))
+        ends[rows, sides // 2] = limits[sides]
+
+    return ends
+
+
+def clip_segments(starts: np.ndarray, ends: np.ndarray, boundary):
+    """
+    Clip the (n, 2) arrays of segments to a bounding box or a convex
+    polygon. Return the mask of the segments crossing it and their
+    clipped ends.
+    """
+    directions = ends - starts
+    t_in, t_out, _ = get_clipping_bounds(starts, directions, boundary)
+    t_in, t_out = np.maximum(t_in, 0), np.minimum(t_out, 1)
+    mask = t_in <= t_out
+
+    return (
+        mask,
+        starts[mask] + t_in[mask, None] * directions[mask],
+        starts[mask] + t_out[mask, None] * directions[mask],
+    )
 
 
 def finish_edges(edges, bounding_box):
-    for edge in edges.copy():
-        if not edge.get_origin().is_defined() or not bounding_box.contains(
-            [edge.get_origin()]):
-            _finish_edge(edge, bounding_box)
+    """
+    End the edges still open once the sweep is over where they leave
+    @bounding_box, which must contain all the vertices. All the rays are
+    clipped at once.
+    """
+    pending = [edge for edge in edges if edge.origin is None]
+
+    if not pending:
+        return
+
+    starts = []
+    directions = []
+    for edge in pending:
+        start = edge.twin.origin
+        site, other = edge.incident_face.site, edge.twin.incident_face.site
+
+        if start is None:
+            # a line, going through the middle of the sites it separates
+            start = Point(((site.x + other.x) / 2, (site.y + other.y) / 2))
+
+        starts.append((start.x, start.y))
+
+        # the face of the edge is on its right, as for the breakpoint that
+        # traced it, if any
+        directions.append((site.y - other.y, other.x - site.x))
+
+    ends = clip_rays(
+        np.array(starts, dtype=float), np.array(directions, dtype=float), bounding_box
+    )
+
+    for edge, end in zip(pending, ends.tolist()):
+        edge.set_origin(Vertex(end))
@@ -0,0 +1,349 @@
+import numpy as np
+
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+from .fortune import Fortune
+from .tesselation import Tesselation
+
+
+def get_triangles(voronoi: Tesselation):
+    """
+    Get the Delaunay triangles dual to the vertices of a tesselation, as
+    the (m, 3) array of the indices of their sites, in counterclockwise
+    order, along with the (m, 2) array of their circumcenters.
+    """
+    arrays = voronoi.to_arrays()
+    origins = arrays["origin_vertices"]
+    faces = arrays["incident_faces"]
+    twins = arrays["twins"]
+
+    # the sites around a vertex are the faces on both sides of the edges
+    # starting from it
+    edges = np.flatnonzero(
+        (origins >= 0) & (origins < len(arrays["vertices"])) & (twins >= 0)
+    )
+    pairs = np.concatenate(
+        (
+            np.stack((origins[edges], faces[edges]), axis=1),
+            np.stack((origins[edges], faces[twins[edges]]), axis=1),
+        )
+    )
+    pairs = np.unique(pairs[pairs[:, 1] >= 0], axis=0)
+
+    counts = np.bincount(pairs[:, 0], minlength=len(arrays["vertices"]))
+    pairs = pairs[counts[pairs[:, 0]] == 3]
+    vertices = pairs[::3, 0]
+    triangles = pairs[:, 1].reshape(-1, 3)
+
+    sites = arrays["sites"]
+    a, b, c = (sites[triangles[:, i]] for i in range(3))
+    cross = (b[:, 0] - a[:, 0]) * (c[:, 1] - a[:, 1]) - (b[:, 1] - a[:, 1]) * (
+        c[:, 0] - a[:, 0]
+    )
+    triangles[cross < 0] = triangles[cross < 0][:, ::-1]
+    keep = cross != 0
+
+    return triangles[keep], arrays["vertices"][vertices[keep]]
+
+
+def get_circumcenters(q: np.ndarray, a: np.ndarray, b: np.ndarray):
+    """
+    Circumcenters of the (n, 2) arrays of triangles (q, a, b).
+    """
+    a, b = a - q, b - q
+    a_2 = np.einsum("ij,ij->i", a, a)
+    b_2 = np.einsum("ij,ij->i", b, b)
+    d = 2 * (a[:, 0] * b[:, 1] - a[:, 1] * b[:, 0])
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        x = (b[:, 1] * a_2 - a[:, 1] * b_2) / d
+        y = (a[:, 0] * b_2 - b[:, 0] * a_2) / d
+
+    return q + np.stack((x, y), axis=1)
+
+
+def get_areas(a: np.ndarray, b: np.ndarray, c: np.ndarray):
+    """
+    Signed areas of the (n, 2) arrays of triangles (a, b, c).
+    """
+    return (
+        (b[:, 0] - a[:, 0]) * (c[:, 1] - a[:, 1])
+        - (b[:, 1] - a[:, 1]) * (c[:, 0] - a[:, 0])
+    ) / 2
+
+
+_interpolator = None
+
+
+def _init_worker(interpolator):
+    global _interpolator
+    _interpolator = interpolator
+
+
+def _interpolate(args):
+    method, queries = args
+    return getattr(_interpolator, f"get_{method}")(queries)
+
+
+class NaturalNeighbourInterpolator:
+    def __init__(self, voronoi: Tesselation, values, cell_factor: float = 2):
+        """
+        Interpolate scattered values, given in the order of the faces of a
+        finished tesselation, with the natural-neighbour (Sibson) or the
+        nearest-neighbour method. The circumcircles of the Delaunay
+        triangles are indexed in a uniform grid whose cells are about
+        @cell_factor times the mean spacing of the sites.
+        """
+        self.sites = np.array(
+            [(face.site.x, face.site.y) for face in voronoi.faces], dtype=float
+        ).reshape(-1, 2)
+        self.values = np.asarray(values, dtype=float)
+
+        if len(self.values) != len(self.sites):
+            raise ValueError("There must be a value per site!")
+
+        self.triangles, self.centers = get_triangles(voronoi)
+        deltas = self.centers - self.sites[self.triangles[:, 0]]
+        self.radii_2 = np.einsum("ij,ij->i", deltas, deltas)
+
+        # sites on the convex hull, i.e. on an edge of a single triangle
+        edges = np.sort(
+            np.concatenate([self.triangles[:, [i, (i + 1) % 3]] for i in range(3)]),
+            axis=1,
+        )
+        edges, counts = np.unique(edges, axis=0, return_counts=True)
+        self.hull = np.unique(edges[counts == 1])
+
+        self.build_grid(cell_factor)
+
+    @classmethod
+    def from_sites(cls, sites, values, offset: float = 0.5, **kwargs):
+        """
+        Compute the diagram of some sites and interpolate @values, given in
+        the order of the sites.
+        """
+        sites = np.asarray(sites, dtype=float).reshape(-1, 2)
+
+        fortune = Fortune(sites, offset)
+        voronoi = fortune.launch(plot=False)
+
+        # the value of a duplicated site is the one of its first copy
+        return cls(voronoi, np.asarray(values)[fortune.site_indices], **kwargs)
+
+    def build_grid(self, cell_factor: float):
+        """
+        Register each triangle in the cells overlapped by the bounding box
+        of its circumcircle, clipped to the bounding box of the sites. The
+        triangles whose circumcircle goes beyond the latter are also kept
+        apart for the queries outside of it.
+        """
+        self.x_min, self.y_min = self.sites.min(axis=0)
+        self.x_max, self.y_max = self.sites.max(axis=0)
+        width = max(self.x_max - self.x_min, 1e-12)
+        height = max(self.y_max - self.y_min, 1e-12)
+
+        size = cell_factor * np.sqrt(width * height / len(self.sites))
+        self.nx = max(1, min(int(width / size) + 1, 4096))
+        self.ny = max(1, min(int(height / size) + 1, 4096))
+        self.dx, self.dy = width / self.nx, height / self.ny
+
+        radii = np.sqrt(self.radii_2)
+        low = self.centers - radii[:, None]
+        high = self.centers + radii[:, None]
+        self.large = np.flatnonzero(
+            (low[:, 0] < self.x_min)
+            | (low[:, 1] < self.y_min)
+            | (high[:, 0] > self.x_max)
+            | (high[:, 1] > self.y_max)
+        )
+
+        ix_0, iy_0 = self.get_cell_coords(low)
+        ix_1, iy_1 = self.get_cell_coords(high)
+        widths = ix_1 - ix_0 + 1
+        counts = widths * (iy_1 - iy_0 + 1)
+
+        triangles = np.repeat(np.arange(len(self.triangles)), counts)
+        k = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        cells = (np.repeat(iy_0, counts) + k // np.repeat(widths, counts)) * self.nx + (
+            np.repeat(ix_0, counts) + k % np.repeat(widths, counts)
+        )
+
+        order = np.argsort(cells, kind="stable")
+        self.cell_items = triangles[order]
+        self.cell_counts = np.bincount(cells, minlength=self.nx * self.ny)
+        self.cell_starts = np.cumsum(self.cell_counts) - self.cell_counts
+
+    def get_cell_coords(self, points: np.ndarray):
+        ix = np.clip(
+            ((points[:, 0] - self.x_min) / self.dx).astype(int), 0, self.nx - 1
+        )
+        iy = np.clip(
+            ((points[:, 1] - self.y_min) / self.dy).astype(int), 0, self.ny - 1
+        )
+        return ix, iy
+
+    def get_conflicts(self, queries: np.ndarray):
+        """
+        Get the pairs of a query and a triangle whose circumcircle contains
+        it, as two arrays of indices.
+        """
+        outside = (
+            (queries[:, 0] < self.x_min)
+            | (queries[:, 0] > self.x_max)
+            | (queries[:, 1] < self.y_min)
+            | (queries[:, 1] > self.y_max)
+        )
+        ix, iy = self.get_cell_coords(queries)
+        cells = iy * self.nx + ix
+
+        counts = np.where(outside, 0, self.cell_counts[cells])
+        q = np.repeat(np.arange(len(queries)), counts)
+        k = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        t = self.cell_items[np.repeat(self.cell_starts[cells], counts) + k]
+
+        # only the large circumcircles may contain the queries out of the grid
+        outside = np.flatnonzero(outside)
+        q = np.concatenate((q, np.repeat(outside, len(self.large))))
+        t = np.concatenate((t, np.tile(self.large, len(outside))))
+
+        deltas = queries[q] - self.centers[t]
+        inside = np.einsum("ij,ij->i", deltas, deltas) < self.radii_2[t]
+
+        return q[inside], t[inside]
+
+    def get_nearest_sites(self, queries: np.ndarray, q=None, t=None):
+        """
+        Get the index of the nearest site of each query. It is a natural
+        neighbour of the query, hence a vertex of a triangle in conflict
+        with it or, if the query is outside of the convex hull, a vertex
+        of the hull.
+        """
+        if q is None:
+            q, t = self.get_conflicts(queries)
+
+        # the hull is searched for the queries out of any triangle
+        inside = np.zeros(len(queries), dtype=bool)
+        inside[q[self.contains(queries[q], t)]] = True
+        outside = np.flatnonzero(~inside)
+
+        q = np.concatenate((np.repeat(q, 3), np.repeat(outside, len(self.hull))))
+        sites = np.concatenate(
+            (self.triangles[t].ravel(), np.tile(self.hull, len(outside)))
+        )
+
+        deltas = queries[q] - self.sites[sites]
+        distances = np.einsum("ij,ij->i", deltas, deltas)
+
+        order = np.lexsort((distances, q))
+        _, first = np.unique(q[order], return_index=True)
+
+        return sites[order[first]], distances[order[first]]
+
+    def contains(self, points: np.ndarray, t: np.ndarray):
+        """
+        Check whether the points lie in the triangles @t.
+        """
+        inside = np.ones(len(points), dtype=bool)
+
+        for i in range(3):
+            a = self.sites[self.triangles[t, i]]
+            b = self.sites[self.triangles[t, (i + 1) % 3]]
+            inside &= get_areas(a, b, points) >= 0
+
+        return inside
+
+    def get_nearest(self, queries: np.ndarray):
+        sites, _ = self.get_nearest_sites(queries)
+        return self.values[sites]
+
+    def get_sibson(self, queries: np.ndarray):
+        """
+        The Sibson coordinate of a natural neighbour is the area the query
+        would steal from its cell. The new cell of the query is split among
+        the triangles in conflict: the triangle (a, b, c) of circumcenter g
+        contributes to a the signed area of (g, cc(q, a, b), cc(q, c, a)),
+        cc being the circumcenter. The queries outside of the convex hull
+        get the value of their nearest site.
+        """
+        q, t = self.get_conflicts(queries)
+        nearest, distances = self.get_nearest_sites(queries, q, t)
+
+        points = queries[q]
+        triangles = self.triangles[t]
+        centers = self.centers[t]
+        vertices = [self.sites[triangles[:, i]] for i in range(3)]
+
+        # circumcenters with the query of the edges (i, i + 1)
+        circumcenters = [
+            get_circumcenters(points, vertices[i], vertices[(i + 1) % 3])
+            for i in range(3)
+        ]
+
+        is_inside = np.zeros(len(queries), dtype=bool)
+        is_inside[q[self.contains(points, t)]] = True
+
+        values = self.values.reshape(len(self.values), -1)
+        numerator = np.zeros((len(queries), values.shape[1]))
+        denominator = np.zeros(len(queries))
+
+        for i in range(3):
+            weights = get_areas(centers, circumcenters[i], circumcenters[i - 1])
+            denominator += np.bincount(q, weights, minlength=len(queries))
+
+            for j in range(values.shape[1]):
+                numerator[:, j] += np.bincount(
+                    q, weights * values[triangles[:, i], j], minlength=len(queries)
+                )
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            values = (numerator / denominator[:, None]).reshape(
+                (len(queries),) + self.values.shape[1:]
+            )
+
+        # the queries on a site or out of the hull take the nearest value
+        fallback = ~is_inside | (distances == 0) | ~np.isfinite(denominator)
+        values[fallback] = self.values[nearest[fallback]]
+
+        return values
+
+    def __call__(
+        self,
+        queries,
+        method: str = "sibson",
+        chunk_size: int = 65536,
+        workers: int = None,
+        processes: bool = False,
+    ):
+        """
+        Interpolate at a (n, 2) array of queries, processed by chunks of
+        @chunk_size. The chunks are dispatched to @workers threads, or
+        processes if @processes is set, unless @workers is 1.
+        """
+        if method not in ("sibson", "nearest"):
+            raise ValueError(f"Unknown interpolation method {method}!")
+
+        queries = np.asarray(queries, dtype=float).reshape(-1, 2)
+        chunks = [
+            queries[i : i + chunk_size] for i in range(0, len(queries), chunk_size)
+        ]
+        interpolate = getattr(self, f"get_{method}")
+
+        if workers == 1 or len(chunks) <= 1:
+            results = [interpolate(chunk) for chunk in chunks]
+
+        elif processes:
+            with ProcessPoolExecutor(
+                workers, initializer=_init_worker, initargs=(self,)
+            ) as executor:
+                results = list(
+                    executor.map(_interpolate, [(method, chunk) for chunk in chunks])
+                )
+
+        else:
+            with ThreadPoolExecutor(workers) as executor:
+                results = list(executor.map(interpolate, chunks))
+
+        if not results:
+            return np.zeros((0,) + self.values.shape[1:])
+
+        return np.concatenate(results)
@@ -0,0 +1,26 @@
+import os
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+# the kernels are compiled with Numba when it is installed, unless the
+# environment variable FORTUNE_BACKEND is set to "python"
+BACKEND = (
+    "numba"
+    if numba is not None and os.environ.get("FORTUNE_BACKEND", "numba") == "numba"
+    else "python"
+)
+
+
+def jit(function):
+    """
+    Compile a numeric kernel with the current backend. The pure-Python
+    version remains available as the py_func attribute in any case.
+    """
+    if BACKEND == "numba":
+        return numba.njit(cache=True)(function)
+
+    function.py_func = function
+    return function
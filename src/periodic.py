@@ -0,0 +1,261 @@
+import numpy as np
+
+from .bounding_box import BoundingBox
+from .fortune import Fortune, normalize_sites
+from .tesselation import Tesselation
+
+# edges shorter than this fraction of the period are of length zero
+DEGENERATE_LENGTH = 1e-9
+
+
+def get_period(domain: BoundingBox):
+    return np.array([domain.x_max - domain.x_min, domain.y_max - domain.y_min])
+
+
+def wrap_sites(sites: np.ndarray, domain: BoundingBox):
+    """
+    Bring the sites into the periodic domain, [x_min, x_max) x [y_min, y_max).
+    """
+    origin = np.array([domain.x_min, domain.y_min])
+    period = get_period(domain)
+    wrapped = np.mod(sites - origin, period)
+
+    # a tiny negative coordinate wraps to the period itself in floating point
+    wrapped[wrapped >= period] = 0
+
+    return origin + wrapped
+
+
+def merge_sites(sites: np.ndarray, domain: BoundingBox, tolerance: float):
+    """
+    Find the sites of the domain within @tolerance of each other, across
+    its boundaries included, which wrapping may have left a few ulps apart.
+    Return for each site the index of the first one it is merged with.
+    """
+    period = get_period(domain)
+    coords = sites - np.array([domain.x_min, domain.y_min])
+    coords = np.where(coords > period - tolerance, coords - period, coords)
+    targets = np.arange(len(sites))
+
+    # only the sites with a neighbour within @tolerance along x are paired
+    order = np.argsort(coords[:, 0], kind="stable")
+    is_close = np.diff(coords[order, 0]) <= tolerance
+    candidates = np.zeros(len(sites), dtype=bool)
+    candidates[order[1:][is_close]] = candidates[order[:-1][is_close]] = True
+    candidates = np.flatnonzero(candidates)
+
+    keys = np.floor(coords[candidates] / tolerance).astype(np.int64).tolist()
+    cells = {}
+    for i, key in zip(candidates.tolist(), keys):
+        cells.setdefault(tuple(key), []).append(i)
+
+    for i, (x, y) in zip(candidates.tolist(), keys):
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                for j in cells.get((x + dx, y + dy), ()):
+                    if (
+                        j < targets[i]
+                        and (np.abs(coords[i] - coords[j]) <= tolerance).all()
+                    ):
+                        targets[i] = j
+
+    while (targets[targets] != targets).any():
+        targets = targets[targets]
+
+    return targets
+
+
+def get_halo(sites: np.ndarray, domain: BoundingBox, margin: float):
+    """
+    Get the images of the sites of the domain, translated by whole periods,
+    that lie within @margin of it, the sites themselves included. Return
+    their (k, 2) array, the indices of their sites and the (k, 2) array of
+    the numbers of periods they are translated by.
+    """
+    period = get_period(domain)
+    low = np.array([domain.x_min, domain.y_min]) - margin
+    high = np.array([domain.x_max, domain.y_max]) + margin
+    reach = np.ceil(margin / period).astype(int)
+
+    images, indices, shifts = [], [], []
+    for i in range(-reach[0], reach[0] + 1):
+        for j in range(-reach[1], reach[1] + 1):
+            shifted = sites + (i, j) * period
+            inside = np.flatnonzero(((shifted >= low) & (shifted < high)).all(axis=1))
+
+            images.append(shifted[inside])
+            indices.append(inside)
+            shifts.append(np.tile((i, j), (len(inside), 1)))
+
+    return np.concatenate(images), np.concatenate(indices), np.concatenate(shifts)
+
+
+def get_margin(arrays: dict, edges: np.ndarray, domain: BoundingBox):
+    """
+    Get the margin around the domain within which the sites must be known
+    for the cells of the half-edges @edges to be the ones of the whole
+    periodic tiling: no other site may be closer to a vertex of a cell than
+    the site of the cell, so the circles centered on the vertices through
+    the site must lie within the margin. The cells can only shrink as
+    sites are added, so that the margin is enough for the final cells. It
+    is infinite while some cells reach the bounding box.
+    """
+    faces = arrays["incident_faces"]
+
+    if (faces[arrays["twins"][edges]] < 0).any():
+        return np.inf
+
+    vertices = arrays["origins"][edges]
+    radii = np.hypot(*(vertices - arrays["sites"][faces[edges]]).T)[:, None]
+    low = np.array([domain.x_min, domain.y_min])
+    high = np.array([domain.x_max, domain.y_max])
+
+    return max((low - vertices + radii).max(), (vertices + radii - high).max(), 0)
+
+
+def compute_periodic(
+    sites: list, domain: BoundingBox, offset: float = 0.5, margin: float = None
+):
+    """
+    Compute the Voronoi diagram of some sites on the torus made of @domain,
+    whose opposite sides are identified. Rather than tiling the plane with
+    nine copies of the sites, only their images within @margin of the
+    domain are added to the sweep, @margin being widened until the cells of
+    the sites are complete. It defaults to a few times the mean distance
+    between the sites.
+
+    Return the tesselation and the indices of the sites of its faces in
+    @sites, wrapped into the domain, the sites equal modulo the period up
+    to rounding errors being merged into the first of them. Each face is the whole cell of its
+    site, which may stick out of the domain, and the twin of a half-edge on
+    the border of two cells wrapping around the domain belongs to the cell
+    on the other side, its vertices then lying one period away. The
+    bounding box of the tesselation is @domain.
+    """
+    period = get_period(domain)
+    sites = wrap_sites(np.asarray(sites, dtype=float).reshape(-1, 2), domain)
+
+    # sites equal modulo the period must be the same site of the sweep
+    sites = sites[merge_sites(sites, domain, DEGENERATE_LENGTH * period.max())]
+    sites, site_indices, _ = normalize_sites(sites)
+    margin = margin or 3 * np.sqrt(period.prod() / len(sites))
+
+    while True:
+        images, indices, shifts = get_halo(sites, domain, margin)
+        fortune = Fortune(images, offset)
+        arrays = fortune.launch(plot=False).to_arrays()
+
+        # the site and the translation of the faces of the sweep
+        face_sites = indices[fortune.site_indices]
+        face_shifts = shifts[fortune.site_indices]
+        is_original = (face_shifts == 0).all(axis=1)
+
+        faces = arrays["incident_faces"]
+        edges = np.flatnonzero((faces >= 0) & is_original[faces])
+
+        required = get_margin(arrays, edges, domain)
+        if required <= margin:
+            break
+
+        # the cells of the first sweeps may be much larger than the final ones
+        margin = min(required, 2 * margin)
+
+    return (
+        get_periodic_tesselation(arrays, edges, sites, face_sites, face_shifts, domain),
+        site_indices,
+    )
+
+
+def get_periodic_tesselation(arrays, edges, sites, face_sites, face_shifts, domain):
+    """
+    Build the tesselation of the torus from the half-edges @edges of the
+    cells of the sites, in the arrays of the sweep over their images: the
+    twin of a half-edge separating the cell of a site from an image
+    translated by some periods is found in the cell of the site of the image,
+    as the half-edge separating it from an image translated the other way.
+    """
+    faces, twins = arrays["incident_faces"], arrays["twins"]
+    nexts, prevs = arrays["nexts"], arrays["prevs"]
+    origins = arrays["origins"]
+    all_vertices = np.concatenate((arrays["vertices"], arrays["boundary_vertices"]))
+
+    # where more than three cells meet, the ties are not broken the same way
+    # around a site and around its images, so the edges of length zero are
+    # removed and their ends merged
+    lengths = np.hypot(*(origins[edges] - origins[twins[edges]]).T)
+    degenerate = np.zeros(len(twins), dtype=bool)
+    degenerate[edges[lengths <= DEGENERATE_LENGTH * get_period(domain).max()]] = True
+    degenerate[twins[degenerate]] = True
+
+    while degenerate[nexts[edges]].any() or degenerate[prevs[edges]].any():
+        nexts = np.where(degenerate[nexts], nexts[nexts], nexts)
+        prevs = np.where(degenerate[prevs], prevs[prevs], prevs)
+
+    roots = list(range(len(all_vertices)))
+    for edge in np.flatnonzero(degenerate).tolist():
+        start = arrays["origin_vertices"][edge]
+        end = arrays["origin_vertices"][twins[edge]]
+
+        while roots[start] != start:
+            start = roots[start]
+        while roots[end] != end:
+            end = roots[end]
+
+        roots[max(start, end)] = min(start, end)
+
+    roots = np.array(roots, dtype=np.int64)
+    while (roots[roots] != roots).any():
+        roots = roots[roots]
+
+    edges = edges[~degenerate[edges]]
+    new_ids = np.full(len(twins), -1, dtype=np.int64)
+    new_ids[edges] = np.arange(len(edges))
+
+    # key each half-edge by its face, the site and the translation of the
+    # face on the other side, which its twin has the other way around
+    face = face_sites[faces[edges]]
+    other = face_sites[faces[twins[edges]]]
+    shift = face_shifts[faces[twins[edges]]]
+    reach = np.abs(shift).max(initial=0)
+    size = 2 * reach + 1
+
+    get_keys = lambda a, b, s: (
+        ((a * len(sites) + b) * size + s[:, 0] + reach) * size + s[:, 1] + reach
+    )
+    keys = get_keys(face, other, shift)
+    twin_keys = get_keys(other, face, -shift)
+
+    order = np.argsort(keys)
+    positions = np.minimum(np.searchsorted(keys[order], twin_keys), len(keys) - 1)
+
+    if (keys[order][positions] != twin_keys).any():
+        raise ValueError("The cells do not match across the periodic boundaries!")
+
+    # the vertices of the cells, shared by the cells on the same side of the
+    # boundaries
+    vertices, origin_vertices = np.unique(
+        roots[arrays["origin_vertices"][edges]], return_inverse=True
+    )
+
+    incident_edges = np.empty(len(vertices), dtype=np.int64)
+    incident_edges[origin_vertices] = np.arange(len(edges))
+    outer_components = np.empty(len(sites), dtype=np.int64)
+    outer_components[face] = np.arange(len(edges))
+
+    return Tesselation.from_arrays(
+        {
+            "sites": sites,
+            "vertices": all_vertices[vertices],
+            "incident_edges": incident_edges,
+            "bounding_box": np.array(
+                [domain.x_min, domain.x_max, domain.y_min, domain.y_max]
+            ),
+            "origins": all_vertices[roots[arrays["origin_vertices"][edges]]],
+            "origin_vertices": origin_vertices,
+            "twins": order[positions],
+            "nexts": new_ids[nexts[edges]],
+            "prevs": new_ids[prevs[edges]],
+            "incident_faces": face,
+            "outer_components": outer_components,
+        }
+    )
@@ -0,0 +1,147 @@
+import numpy as np
+
+from concurrent.futures import ThreadPoolExecutor
+
+from .tesselation import Tesselation
+
+
+def get_polygon_edges(voronoi: Tesselation):
+    """
+    Get the sides of the cells of a closed tesselation, as the (n,) array
+    of the indices of their faces and the (n, 2, 2) array of their ends.
+    """
+    arrays = voronoi.to_arrays()
+    faces = arrays["incident_faces"]
+    twins = arrays["twins"]
+    origins = arrays["origins"]
+
+    edges = np.flatnonzero((faces >= 0) & (twins >= 0))
+    segments = np.stack((origins[edges], origins[twins[edges]]), axis=1)
+
+    # horizontal sides do not bound any span
+    keep = segments[:, 0, 1] != segments[:, 1, 1]
+
+    return faces[edges][keep], segments[keep]
+
+
+def fill_band(out, faces, segments, grid, rows):
+    """
+    Fill the rows [start, stop) of the label grid.
+    """
+    x_min, y_max, dx, dy, width = grid
+    start, stop = rows
+
+    # rows whose center lies between the ends of each side, in the band
+    y_low = segments[:, :, 1].min(axis=1)
+    y_high = segments[:, :, 1].max(axis=1)
+    first = np.maximum(np.ceil((y_max - y_high) / dy - 0.5).astype(np.int64), start)
+    last = np.minimum(np.floor((y_max - y_low) / dy - 0.5).astype(np.int64), stop - 1)
+    counts = np.maximum(last - first + 1, 0)
+
+    sides = np.repeat(np.arange(len(segments)), counts)
+    rows = np.repeat(first, counts) + (
+        np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    )
+
+    # abscissae where the sides cross the centers of the rows
+    (x_0, y_0), (x_1, y_1) = segments[sides, 0].T, segments[sides, 1].T
+    y = y_max - (rows + 0.5) * dy
+    x = x_0 + (y - y_0) * (x_1 - x_0) / (y_1 - y_0)
+
+    # a convex cell covers a single span per row, between its extreme
+    # crossings
+    keys = faces[sides] * (stop - start) + (rows - start)
+    order = np.argsort(keys, kind="stable")
+    keys, x = keys[order], x[order]
+    bounds = np.flatnonzero(np.diff(keys, prepend=-1))
+    keys = keys[bounds]
+    span_rows = keys % (stop - start)
+    span_faces = keys // (stop - start)
+    x_left = np.minimum.reduceat(x, bounds)
+    x_right = np.maximum.reduceat(x, bounds)
+
+    # pixels whose center lies in [x_left, x_right)
+    col_left = np.clip(np.ceil((x_left - x_min) / dx - 0.5), 0, width).astype(np.int64)
+    col_right = np.clip(np.ceil((x_right - x_min) / dx - 0.5), 0, width).astype(
+        np.int64
+    )
+    keep = col_left < col_right
+
+    # the spans of a row are adjacent, so each pixel belongs to the last span
+    # starting before it
+    n_rows = stop - start
+    starts = np.full((n_rows, width), -1, dtype=np.int64)
+    starts[span_rows[keep], col_left[keep]] = span_faces[keep]
+    indices = np.where(starts >= 0, np.arange(width), 0)
+    np.maximum.accumulate(indices, axis=1, out=indices)
+    labels = np.take_along_axis(starts, indices, axis=1)
+
+    # pixels out of all the spans
+    row_left = np.full(n_rows, width)
+    row_right = np.zeros(n_rows, dtype=np.int64)
+    np.minimum.at(row_left, span_rows[keep], col_left[keep])
+    np.maximum.at(row_right, span_rows[keep], col_right[keep])
+    columns = np.arange(width)
+    labels[(columns < row_left[:, None]) | (columns >= row_right[:, None])] = -1
+
+    out[start:stop] = labels
+
+
+def rasterize(
+    voronoi: Tesselation,
+    shape: tuple,
+    bounding_box=None,
+    out: np.ndarray = None,
+    path: str = None,
+    band_size: int = 256,
+    workers: int = None,
+):
+    """
+    Get the (height, width) grid of the indices of the faces owning the
+    pixels over @bounding_box (the one of the tesselation by default), the
+    first row being at the top. The cells of the closed tesselation are
+    scan-converted by bands of @band_size rows, spread over @workers
+    threads unless it is 1. The labels are written in @out if given, or in
+    a memory-mapped .npy file at @path, and -1 marks the pixels out of all
+    the cells.
+    """
+    height, width = shape
+    bounding_box = bounding_box or voronoi.bounding_box
+
+    if bounding_box is None:
+        raise ValueError("The tesselation must be closed, or a box given!")
+
+    if out is None and path is not None:
+        out = np.lib.format.open_memmap(path, mode="w+", dtype=np.int32, shape=shape)
+    elif out is None:
+        out = np.empty(shape, dtype=np.int32)
+    elif out.shape != tuple(shape):
+        raise ValueError(f"The output must be of shape {shape}!")
+
+    faces, segments = get_polygon_edges(voronoi)
+    grid = (
+        bounding_box.x_min,
+        bounding_box.y_max,
+        (bounding_box.x_max - bounding_box.x_min) / width,
+        (bounding_box.y_max - bounding_box.y_min) / height,
+        width,
+    )
+    bands = [
+        (start, min(start + band_size, height)) for start in range(0, height, band_size)
+    ]
+
+    if workers == 1 or len(bands) <= 1:
+        for band in bands:
+            fill_band(out, faces, segments, grid, band)
+    else:
+        with ThreadPoolExecutor(workers) as executor:
+            list(
+                executor.map(
+                    lambda band: fill_band(out, faces, segments, grid, band), bands
+                )
+            )
+
+    if isinstance(out, np.memmap):
+        out.flush()
+
+    return out
@@ -0,0 +1,162 @@
+import os
+import time
+import asyncio
+import weakref
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+
+from .cache import get_key
+from .fortune import Fortune
+from .tesselation import Tesselation
+
+
+class SweepInterrupted(Exception):
+    def __init__(self, message: str, processed: int, total: int):
+        """
+        Raised when a sweep is stopped before its end, with the number of
+        events processed so far and the expected total.
+        """
+        super().__init__(f"{message} after {processed} of {total} events!")
+        self.processed = processed
+        self.total = total
+
+
+class SweepTimeout(SweepInterrupted):
+    pass
+
+
+class SweepCancelled(SweepInterrupted):
+    pass
+
+
+class SweepService:
+    def __init__(
+        self, max_concurrent: int = None, report_every: int = 1000, cache=None
+    ):
+        """
+        Compute Voronoi diagrams from asyncio code. The sweeps run in a pool
+        of at most @max_concurrent threads and check between two events
+        whether they were cancelled or ran out of time. Every @report_every
+        events, they report their progress and release the GIL, so that the
+        event loop and the other requests are not starved. An optional
+        ResultCache serves the site sets already computed. The service can
+        be used from several event loops, each admitting @max_concurrent
+        sweeps, which share the threads.
+        """
+        self.max_concurrent = max_concurrent or os.cpu_count() or 1
+        self.report_every = report_every
+        self.cache = cache
+        self.executor = ThreadPoolExecutor(self.max_concurrent)
+        # an asyncio semaphore is bound to the loop it is first used in
+        self.semaphores = weakref.WeakKeyDictionary()
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def run(self, sites, offset, stop, deadline, report):
+        """
+        Run a sweep in a worker thread.
+        """
+        if self.cache is not None:
+            key = get_key(sites, offset)
+            arrays = self.cache.get(key)
+            if arrays is not None:
+                return Tesselation.from_arrays(arrays)
+
+        fortune = Fortune(sites, offset)
+        processed = 0
+        total = lambda: processed + len(fortune.event_queue)
+
+        while True:
+            if stop.is_set():
+                raise SweepCancelled("Sweep cancelled", processed, total())
+
+            if deadline is not None and time.monotonic() > deadline:
+                raise SweepTimeout("Time budget exceeded", processed, total())
+
+            if fortune.step() is None:
+                break
+
+            processed += 1
+            if processed % self.report_every == 0:
+                report(processed, total())
+                time.sleep(0)
+
+        fortune.finish()
+        report(processed, processed)
+
+        if self.cache is not None:
+            self.cache.put(key, fortune.voronoi.to_arrays())
+
+        return fortune.voronoi
+
+    async def compute(
+        self,
+        sites: list,
+        offset: float = 0.5,
+        timeout: float = None,
+        progress=None,
+    ):
+        """
+        Compute the Voronoi diagram of some sites without blocking the event
+        loop. @progress is called in the loop with the number of events
+        processed and the expected total, the latter being the number of
+        events processed or still queued and growing with the circle events
+        found. SweepTimeout is raised if the diagram is not ready after
+        @timeout seconds, including the time spent waiting for a thread.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        stop = threading.Event()
+
+        semaphore = self.semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self.semaphores[loop] = asyncio.Semaphore(self.max_concurrent)
+
+        def report(processed: int, total: int):
+            if progress is not None:
+                loop.call_soon_threadsafe(progress, processed, total)
+
+        def release(_):
+            # the loop may be closed by the time a cancelled worker stops
+            try:
+                loop.call_soon_threadsafe(semaphore.release)
+            except RuntimeError:
+                pass
+
+        try:
+            await asyncio.wait_for(semaphore.acquire(), timeout)
+        except asyncio.TimeoutError:
+            raise SweepTimeout("Time budget exceeded", 0, len(sites)) from None
+
+        try:
+            future = self.executor.submit(
+                self.run, sites, offset, stop, deadline, report
+            )
+        except BaseException:
+            semaphore.release()
+            raise
+
+        # the slot is given back when the worker is done, not when the
+        # caller stops waiting for it, so that cancelled sweeps still count
+        future.add_done_callback(release)
+
+        try:
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            # the worker stops at the next event
+            stop.set()
+            raise
+
+
+async def compute_async(sites: list, **kwargs):
+    """
+    Compute a single diagram with a one-off service, see SweepService.
+    """
+    service = SweepService(max_concurrent=1)
+
+    try:
+        return await service.compute(sites, **kwargs)
+    finally:
+        service.close()
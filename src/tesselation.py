@@ -1,27 +1,40 @@
+import math
 import numpy as np
 
+from .bounding_box import BoundingBox
 from .point import Point
 
 
 class Vertex(Point):
-    def __init__(self, coords: tuple, breakpoint=None):
+    def __init__(self, coords: tuple):
         super().__init__(coords)
-        self.breakpoint = breakpoint
+        self.incident_edge = None
 
     def set_incident_edge(self, incident_edge: "HalfEdge"):
         self.incident_edge = incident_edge
 
-    def get_breakpoint(self):
-        return self.breakpoint
+    def get_incident_edges(self):
+        """
+        Iterate over the half-edges starting from the vertex, once the
+        tesselation is closed.
+        """
+        edge = self.incident_edge
+
+        while edge:
+            yield edge
+            edge = edge.prev.twin if edge.prev else None
+
+            if edge is self.incident_edge:
+                return
 
     def is_defined(self):
-        return not np.isinf(self.as_array()).any()
+        return math.isfinite(self.x) and math.isfinite(self.y)
 
 
 class HalfEdge:
     def __init__(
         self,
-        origin,
+        origin: Vertex,
         twin: "HalfEdge" = None,
         prev: "HalfEdge" = None,
         next: "HalfEdge" = None,
@@ -32,11 +45,23 @@ class HalfEdge:
         self.prev = prev
         self.next = next
         self.incident_face = incident_face
-        incident_face.set_outer_component(self)
+
+        if incident_face:
+            incident_face.set_outer_component(self)
 
     def get_origin(self):
         return self.origin
 
+    def get_origin_coords(self):
+        """
+        Coordinates of the origin, infinite while the breakpoint tracing the
+        edge has not reached it yet, in which case the origin is None.
+        """
+        if self.origin is None:
+            return math.inf, math.inf
+
+        return self.origin.x, self.origin.y
+
     def get_twin(self):
         return self.twin
 
@@ -68,6 +93,28 @@ class Face:
         if not self.outer_component:
             self.outer_component = outer_component
 
+    def get_edges(self):
+        """
+        Iterate over the half-edges around the face, once the tesselation is
+        closed.
+        """
+        edge = self.outer_component
+
+        while edge:
+            yield edge
+            edge = edge.next
+
+            if edge is self.outer_component:
+                return
+
+    def get_neighbours(self):
+        """
+        Iterate over the faces sharing an edge with the face.
+        """
+        for edge in self.get_edges():
+            if edge.twin and edge.twin.incident_face:
+                yield edge.twin.incident_face
+
 
 class Tesselation:
     def __init__(self):
@@ -75,5 +122,259 @@ class Tesselation:
         self.half_edges = []
         self.faces = []
 
+        # faces indexed by the coordinates of their site
+        self.faces_by_site = {}
+
+        # vertices where the edges meet the bounding box, and its corners
+        self.boundary_vertices = []
+        self.bounding_box = None
+
     def plot(self):
         pass
+
+    def get_face(self, site: Point):
+        """
+        Get the face of a site, the sites being distinct.
+        """
+        if len(self.faces_by_site) != len(self.faces):
+            self.faces_by_site = {
+                (face.site.x, face.site.y): face for face in self.faces
+            }
+
+        return self.faces_by_site[(site.x, site.y)]
+
+    def close(self, bounding_box):
+        """
+        Complete the half-edge structure once all the edges end on a vertex
+        or on @bounding_box: the sides of the box are split into edges, whose
+        twins lie outside of any face, and the half-edges around each face
+        are linked into a cycle. Like the edges traced by the sweep, the
+        half-edges go around their face clockwise.
+        """
+        x_min, x_max = bounding_box.x_min, bounding_box.x_max
+        y_min, y_max = bounding_box.y_min, bounding_box.y_max
+        width, height = x_max - x_min, y_max - y_min
+        corners = [Vertex(corner) for corner in bounding_box.get_coordinates()]
+
+        def get_position(point):
+            # position along the outline of the box, counterclockwise from
+            # its lower left corner
+            if point.y == y_min:
+                return (point.x - x_min) / width
+            if point.x == x_max:
+                return 1 + (point.y - y_min) / height
+            if point.y == y_max:
+                return 2 + (x_max - point.x) / width
+            return 3 + (y_max - point.y) / height
+
+        def get_box_edges(face, start, end):
+            # split the outline of the box from start to end, clockwise
+            start_position = get_position(start) if start else 0
+            distance = (start_position - get_position(end)) % 4 if end else 4
+            passed = sorted(
+                ((start_position - k) % 4, k)
+                for k in range(4)
+                if 0 < (start_position - k) % 4 < distance
+            )
+            points = [start or corners[0]] + [corners[k] for _, k in passed]
+            points.append(end or corners[0])
+
+            box_edges = []
+            for origin, destination in zip(points, points[1:]):
+                edge = HalfEdge(origin, incident_face=face)
+                edge.set_twin(HalfEdge(destination))
+                box_edges.append(edge)
+
+            return box_edges
+
+        edges_by_face = {id(face): [] for face in self.faces}
+        for edge in self.half_edges:
+            edges_by_face[id(edge.incident_face)].append(edge)
+
+        box_edges = []
+
+        for face in self.faces:
+            edges = edges_by_face[id(face)]
+
+            if not edges:
+                cycle = get_box_edges(face, None, None)
+                box_edges.extend(cycle)
+
+            else:
+                # the edges around a face share their vertices, so they are
+                # chained from the ones leaving the box, if any, to the ones
+                # reaching it
+                by_origin = {id(edge.origin): edge for edge in edges}
+                ends = {id(edge.twin.origin) for edge in edges}
+                starts = [edge for edge in edges if id(edge.origin) not in ends]
+
+                # the chains of a face between parallel lines follow each
+                # other clockwise along the box
+                starts.sort(key=lambda edge: get_position(edge.origin), reverse=True)
+                starts = starts or edges[:1]
+
+                cycle = []
+                for i, first in enumerate(starts):
+                    edge = first
+                    while edge is not None:
+                        cycle.append(edge)
+                        edge = by_origin.get(id(edge.twin.origin))
+                        edge = None if edge is first else edge
+
+                    # the gap between the ends on the box is filled with the
+                    # sides of the box in between
+                    end = cycle[-1].twin.origin
+                    start = starts[(i + 1) % len(starts)].origin
+
+                    if end is not start:
+                        gap = get_box_edges(face, end, start)
+                        cycle.extend(gap)
+                        box_edges.extend(gap)
+
+            for edge, next_edge in zip(cycle, cycle[1:] + cycle[:1]):
+                edge.set_next(next_edge)
+            face.outer_component = cycle[0]
+
+        # the twins of the box edges go around the box counterclockwise
+        outline = sorted(
+            (edge.twin for edge in box_edges),
+            key=lambda edge: get_position(
+                Point(
+                    (
+                        (edge.origin.x + edge.twin.origin.x) / 2,
+                        (edge.origin.y + edge.twin.origin.y) / 2,
+                    )
+                )
+            ),
+        )
+        for edge, next_edge in zip(outline, outline[1:] + outline[:1]):
+            edge.set_next(next_edge)
+
+        for edge in box_edges:
+            self.half_edges.extend((edge, edge.twin))
+
+        known = {id(vertex) for vertex in self.vertices}
+
+        for edge in self.half_edges:
+            edge.origin.set_incident_edge(edge)
+
+            if id(edge.origin) not in known:
+                known.add(id(edge.origin))
+                self.boundary_vertices.append(edge.origin)
+
+        self.bounding_box = bounding_box
+
+    def to_arrays(self):
+        """
+        Flatten the tesselation into a dictionary of arrays, where the
+        vertices, the half-edges and the faces are referred to by their
+        indices (-1 standing for None).
+        """
+        all_vertices = self.vertices + self.boundary_vertices
+        vertex_ids = {id(vertex): i for i, vertex in enumerate(all_vertices)}
+        edge_ids = {id(edge): i for i, edge in enumerate(self.half_edges)}
+        face_ids = {id(face): i for i, face in enumerate(self.faces)}
+
+        get_id = lambda ids, x: -1 if x is None else ids.get(id(x), -1)
+        edges = self.half_edges
+        box = self.bounding_box
+
+        return {
+            "sites": np.array(
+                [(face.site.x, face.site.y) for face in self.faces], dtype=float
+            ).reshape(-1, 2),
+            "vertices": np.array(
+                [(vertex.x, vertex.y) for vertex in self.vertices], dtype=float
+            ).reshape(-1, 2),
+            "boundary_vertices": np.array(
+                [(vertex.x, vertex.y) for vertex in self.boundary_vertices],
+                dtype=float,
+            ).reshape(-1, 2),
+            "incident_edges": np.array(
+                [get_id(edge_ids, vertex.incident_edge) for vertex in all_vertices],
+                dtype=np.int64,
+            ),
+            "bounding_box": np.array(
+                [box.x_min, box.x_max, box.y_min, box.y_max] if box else [np.nan] * 4
+            ),
+            "origins": np.array(
+                [edge.get_origin_coords() for edge in edges], dtype=float
+            ).reshape(-1, 2),
+            "origin_vertices": np.array(
+                [get_id(vertex_ids, edge.origin) for edge in edges], dtype=np.int64
+            ),
+            "twins": np.array(
+                [get_id(edge_ids, edge.twin) for edge in edges], dtype=np.int64
+            ),
+            "nexts": np.array(
+                [get_id(edge_ids, edge.next) for edge in edges], dtype=np.int64
+            ),
+            "prevs": np.array(
+                [get_id(edge_ids, edge.prev) for edge in edges], dtype=np.int64
+            ),
+            "incident_faces": np.array(
+                [get_id(face_ids, edge.incident_face) for edge in edges],
+                dtype=np.int64,
+            ),
+            "outer_components": np.array(
+                [get_id(edge_ids, face.outer_component) for face in self.faces],
+                dtype=np.int64,
+            ),
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays: dict):
+        """
+        Rebuild a tesselation from the output of to_arrays.
+        """
+        tesselation = cls()
+        tesselation.faces = [Face(Point(site)) for site in arrays["sites"].tolist()]
+        tesselation.vertices = [
+            Vertex(vertex) for vertex in arrays["vertices"].tolist()
+        ]
+        tesselation.boundary_vertices = [
+            Vertex(vertex)
+            for vertex in arrays.get("boundary_vertices", np.empty((0, 2))).tolist()
+        ]
+
+        get = lambda objects, i: None if i < 0 else objects[i]
+        faces = tesselation.faces
+        vertices = tesselation.vertices + tesselation.boundary_vertices
+        edges = tesselation.half_edges
+
+        for origin, vertex, face in zip(
+            arrays["origins"].tolist(),
+            arrays["origin_vertices"].tolist(),
+            arrays["incident_faces"].tolist(),
+        ):
+            edge = HalfEdge.__new__(HalfEdge)
+            if vertex >= 0:
+                edge.origin = vertices[vertex]
+            else:
+                edge.origin = Vertex(origin) if math.isfinite(origin[0]) else None
+            edge.incident_face = get(faces, face)
+            edges.append(edge)
+
+        for edge, twin, next, prev in zip(
+            edges,
+            arrays["twins"].tolist(),
+            arrays["nexts"].tolist(),
+            arrays["prevs"].tolist(),
+        ):
+            edge.twin = get(edges, twin)
+            edge.next = get(edges, next)
+            edge.prev = get(edges, prev)
+
+        for face, outer_component in zip(faces, arrays["outer_components"].tolist()):
+            face.outer_component = get(edges, outer_component)
+
+        for vertex, edge in zip(
+            vertices, arrays.get("incident_edges", np.empty(0, int)).tolist()
+        ):
+            vertex.incident_edge = get(edges, edge)
+
+        limits = arrays.get("bounding_box", np.full(4, np.nan))
+        if not np.isnan(limits).any():
+            tesselation.bounding_box = BoundingBox.from_limits(*limits.tolist())
+
+        return tesselation
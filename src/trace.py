@@ -0,0 +1,335 @@
+import struct
+import numpy as np
+
+from .bounding_box import BoundingBox
+from .event_queue import CircleEvent
+
+MAGIC = b"FTRC"
+VERSION = 2
+
+# event types
+SITE, CIRCLE, FINISH = 0, 1, 2
+
+HEADER = struct.Struct("<4sBIdddd")  # magic, version, #sites, bounding box
+EVENT = struct.Struct("<BBddddBBBB")  # type, validity, x, y, radius, sweep, counts
+ARC_REMOVED = struct.Struct("<I")  # arc
+ARC_CREATED = struct.Struct("<II")  # arc, site
+EDGE_CREATED = struct.Struct("<iidd")  # twin, site of the incident face, origin
+EDGE_UPDATED = struct.Struct("<Idd")  # edge, origin
+N_EDGES = struct.Struct("<I")
+
+
+class TraceRecorder:
+    def __init__(self, file):
+        """
+        Write a compact binary trace of the events handled by a sweep.
+        @file is either a path or a binary file object.
+        """
+        self.owns_file = isinstance(file, str)
+        self.file = open(file, "wb") if self.owns_file else file
+
+        # the arcs and the edges are identified by integers in the trace
+        self.site_ids = {}
+        self.arc_ids = {}
+        self.edge_ids = {}
+        self.n_arcs = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        if self.owns_file:
+            self.file.close()
+        else:
+            self.file.flush()
+
+    def start(self, sites: list, bounding_box: BoundingBox):
+        self.site_ids = {id(site): i for i, site in enumerate(sites)}
+
+        self.file.write(
+            HEADER.pack(
+                MAGIC,
+                VERSION,
+                len(sites),
+                bounding_box.x_min,
+                bounding_box.x_max,
+                bounding_box.y_min,
+                bounding_box.y_max,
+            )
+        )
+        self.file.write(
+            np.array([(site.x, site.y) for site in sites], dtype="<f8").tobytes()
+        )
+
+    def record(
+        self,
+        event,
+        removed_arcs: tuple = (),
+        created_arcs: tuple = (),
+        created_edges: tuple = (),
+        updated_edges: tuple = (),
+    ):
+        """
+        Record an event along with the changes it made to the beach line
+        and to the tesselation.
+        """
+        is_circle = isinstance(event, CircleEvent)
+
+        for edge in created_edges:
+            self.edge_ids[id(edge)] = len(self.edge_ids)
+
+        chunks = [
+            EVENT.pack(
+                CIRCLE if is_circle else SITE,
+                event.is_valid,
+                event.point.x,
+                event.point.y,
+                event.radius if is_circle else 0.0,
+                event.sweep_line.get_height(),
+                len(removed_arcs),
+                len(created_arcs),
+                len(created_edges),
+                len(updated_edges),
+            )
+        ]
+
+        for arc in removed_arcs:
+            chunks.append(ARC_REMOVED.pack(self.arc_ids.pop(id(arc))))
+
+        for arc in created_arcs:
+            self.arc_ids[id(arc)] = self.n_arcs
+            chunks.append(ARC_CREATED.pack(self.n_arcs, self.site_ids[id(arc.focus)]))
+            self.n_arcs += 1
+
+        for edge in created_edges:
+            chunks.append(self.pack_edge(edge))
+
+        for edge in updated_edges:
+            chunks.append(
+                EDGE_UPDATED.pack(self.edge_ids[id(edge)], edge.origin.x, edge.origin.y)
+            )
+
+        self.file.write(b"".join(chunks))
+
+    def finish(self, half_edges: list):
+        """
+        Record the edges added once the sweep is over, along the bounding
+        box, and the origins of all the edges once the incomplete ones
+        have been defined.
+        """
+        created = [edge for edge in half_edges if id(edge) not in self.edge_ids]
+        for edge in created:
+            self.edge_ids[id(edge)] = len(self.edge_ids)
+
+        nan = float("nan")
+        chunks = [EVENT.pack(FINISH, True, nan, nan, nan, nan, 0, 0, len(created), 0)]
+        chunks.extend(self.pack_edge(edge) for edge in created)
+        chunks.append(N_EDGES.pack(len(half_edges)))
+        chunks.append(
+            np.array(
+                [(edge.origin.x, edge.origin.y) for edge in half_edges], dtype="<f8"
+            ).tobytes()
+        )
+        self.file.write(b"".join(chunks))
+
+    def pack_edge(self, edge):
+        face = edge.incident_face
+        return EDGE_CREATED.pack(
+            self.edge_ids.get(id(edge.twin), -1),
+            self.site_ids[id(face.site)] if face else -1,
+            *edge.get_origin_coords(),
+        )
+
+
+class TraceEvent:
+    def __init__(self, type, is_valid, x, y, radius, y_sweep_line):
+        self.type = type
+        self.is_valid = bool(is_valid)
+        self.x = x
+        self.y = y
+        self.radius = radius
+        self.y_sweep_line = y_sweep_line
+        self.removed_arcs = []
+        self.created_arcs = []
+        self.created_edges = []
+        self.updated_edges = []
+        self.origins = None
+
+
+def _read(file, size: int):
+    data = file.read(size)
+    if len(data) != size:
+        raise EOFError("Truncated trace!")
+    return data
+
+
+def read_trace(file):
+    """
+    Read a trace, yielding its sites and bounding box first, and then
+    the recorded events.
+    """
+    magic, version, n_sites, *limits = HEADER.unpack(_read(file, HEADER.size))
+
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("Not a trace of the Fortune's algorithm!")
+
+    sites = np.frombuffer(_read(file, 16 * n_sites), dtype="<f8").reshape(-1, 2)
+    yield sites, BoundingBox.from_limits(*limits)
+
+    while header := file.read(EVENT.size):
+        if len(header) != EVENT.size:
+            raise EOFError("Truncated trace!")
+
+        *fields, n_removed, n_created, n_edges, n_updated = EVENT.unpack(header)
+        event = TraceEvent(*fields)
+
+        if event.type == FINISH:
+            event.created_edges.extend(
+                EDGE_CREATED.iter_unpack(_read(file, EDGE_CREATED.size * n_edges))
+            )
+            (n_edges,) = N_EDGES.unpack(_read(file, N_EDGES.size))
+            event.origins = np.frombuffer(
+                _read(file, 16 * n_edges), dtype="<f8"
+            ).reshape(-1, 2)
+            yield event
+            continue
+
+        for records, layout, n in (
+            (event.removed_arcs, ARC_REMOVED, n_removed),
+            (event.created_arcs, ARC_CREATED, n_created),
+            (event.created_edges, EDGE_CREATED, n_edges),
+            (event.updated_edges, EDGE_UPDATED, n_updated),
+        ):
+            records.extend(layout.iter_unpack(_read(file, layout.size * n)))
+
+        yield event
+
+
+class Replayer:
+    def __init__(self, file):
+        """
+        Rebuild the intermediate states of a sweep from its trace, without
+        running the geometry again. @file is either a path or a binary
+        file object.
+        """
+        self.owns_file = isinstance(file, str)
+        self.file = open(file, "rb") if self.owns_file else file
+        self.events = read_trace(self.file)
+        self.sites, self.bounding_box = next(self.events)
+
+        # current state
+        self.event = None
+        self.arcs = []  # (arc, site) pairs, from left to right
+        self.vertices = []
+        self.origins = []
+        self.twins = []
+        self.faces = []
+
+    def __iter__(self):
+        """
+        Apply the recorded events one by one, yielding the replayer in
+        its updated state after each of them.
+        """
+        try:
+            for event in self.events:
+                self.apply(event)
+                yield self
+        finally:
+            if self.owns_file:
+                self.file.close()
+
+    def apply(self, event: TraceEvent):
+        self.event = event
+
+        if event.type == FINISH:
+            for twin, face, _, _ in event.created_edges:
+                self.twins.append(twin)
+                self.faces.append(face)
+            self.origins = [tuple(origin) for origin in event.origins]
+            return
+
+        removed = {arc for (arc,) in event.removed_arcs}
+        position = next(
+            (i for i, (arc, _) in enumerate(self.arcs) if arc in removed),
+            len(self.arcs),
+        )
+        self.arcs[position : position + len(removed)] = event.created_arcs
+
+        if event.type == CIRCLE and event.is_valid:
+            self.vertices.append((event.x, event.y))
+
+        for twin, face, x, y in event.created_edges:
+            self.twins.append(twin)
+            self.faces.append(face)
+            self.origins.append((x, y))
+
+        for edge, x, y in event.updated_edges:
+            self.origins[edge] = (x, y)
+
+    @property
+    def y_sweep_line(self):
+        return self.event.y_sweep_line if self.event else None
+
+    def get_foci(self):
+        return self.sites[[site for _, site in self.arcs]].reshape(-1, 2)
+
+    def get_vertices(self):
+        return np.array(self.vertices, dtype=float).reshape(-1, 2)
+
+    def get_edges(self):
+        """
+        Get the pairs of twin half-edges, each pair once, and the segments
+        joining their origins.
+        """
+        origins = np.array(self.origins, dtype=float).reshape(-1, 2)
+        twins = np.array(self.twins, dtype=int)
+        edges = np.flatnonzero(twins > np.arange(len(twins)))
+
+        return edges, np.stack((origins[edges], origins[twins[edges]]), axis=1)
+
+    def get_segments(self):
+        """
+        Get the finite segments of the edges.
+        """
+        _, segments = self.get_edges()
+        return segments[np.isfinite(segments).all(axis=(1, 2))]
+
+    def get_circle(self):
+        if self.event is None or self.event.type != CIRCLE:
+            return
+
+        return self.event.x, self.event.y, self.event.radius, self.event.is_valid
+
+    def record(self, step: int = 1):
+        """
+        Replay the whole trace into a recording that can be exported as
+        an animation, keeping a frame every @step events.
+        """
+        from .animation import Recording
+
+        recording = Recording(self.sites, self.bounding_box)
+        drawn = np.zeros(0, dtype=bool)
+
+        for i, state in enumerate(self):
+            is_final = state.event.type == FINISH
+            if i % step and not is_final:
+                continue
+
+            # the recording expects the segments in the order they appear
+            _, segments = state.get_edges()
+            drawn = np.concatenate((drawn, np.zeros(len(segments) - len(drawn), bool)))
+            new = np.isfinite(segments).all(axis=(1, 2)) & ~drawn
+            drawn |= new
+
+            recording.add_frame(
+                segments[new],
+                state.vertices[len(recording.vertices) :],
+                None if is_final else state.get_foci(),
+                None if is_final else state.y_sweep_line,
+                None if is_final else state.get_circle(),
+            )
+
+        return recording
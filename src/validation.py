@@ -0,0 +1,383 @@
+import math
+import numpy as np
+
+from .beach_line import Arc, BreakPoint
+from .event_queue import CircleEvent
+
+# relative tolerance of the checks, scaled by the size of the diagram
+TOLERANCE = 1e-9
+
+# the breakpoints between foci at nearly the same height lose about half of
+# the significant digits, relatively to the distance to the sweep line
+BREAKPOINT_TOLERANCE = 1e-6
+
+
+class ValidationError(Exception):
+    pass
+
+
+def _check(condition: bool, message: str):
+    if not condition:
+        raise ValidationError(message)
+
+
+def check_beach_line(beach_line, y_sweep_line: float, tolerance: float = 0):
+    """
+    Check that the nodes of the beach line alternate between arcs and
+    breakpoints, with consistent links, that the breakpoints are sorted by
+    x for the sweep line at @y_sweep_line unless it is None, that the tree
+    is balanced, and that the circle event of every arc points back to it.
+    """
+    nodes = beach_line.get_nodes_ordered()
+
+    if not nodes:
+        return
+
+    _check(beach_line.root.parent is None, "The root has a parent!")
+
+    heights = {}
+    for node in _post_order(beach_line.root):
+        for side in ("left", "right"):
+            child = getattr(node, side)
+            _check(
+                child is None or (child.parent is node and child.parent_side == side),
+                f"Broken link between a node and its {side} child!",
+            )
+
+        left = heights.get(id(node.left), 0)
+        right = heights.get(id(node.right), 0)
+        _check(abs(right - left) <= 1, "The beach line is not balanced!")
+        heights[id(node)] = 1 + max(left, right)
+
+    x_previous = -math.inf
+
+    for i, node in enumerate(nodes):
+        is_arc = i % 2 == 0
+        _check(
+            isinstance(node, Arc if is_arc else BreakPoint),
+            "The arcs and the breakpoints do not alternate!",
+        )
+
+        if is_arc:
+            left = nodes[i - 1] if i > 0 else None
+            right = nodes[i + 1] if i + 1 < len(nodes) else None
+            _check(
+                node.left_breakpoint is left and node.right_breakpoint is right,
+                "An arc is not linked to its breakpoints!",
+            )
+
+            event = node.event
+            _check(
+                not (isinstance(event, CircleEvent) and event.is_valid)
+                or event.arc is node,
+                "The circle event of an arc does not point back to it!",
+            )
+            continue
+
+        _check(
+            node.left_arc is nodes[i - 1] and node.right_arc is nodes[i + 1],
+            "A breakpoint is not linked to its arcs!",
+        )
+
+        if y_sweep_line is None:
+            continue
+
+        x = node.get_key(y_sweep_line)
+        _check(x >= x_previous - tolerance, "The breakpoints are not sorted!")
+        x_previous = max(x_previous, x)
+
+
+def _post_order(root):
+    stack, nodes = [root], []
+
+    while stack:
+        node = stack.pop()
+        nodes.append(node)
+        stack.extend(child for child in (node.left, node.right) if child)
+
+    return reversed(nodes)
+
+
+def check_sweep(fortune, event=None):
+    """
+    Check the invariants of an ongoing sweep, after @event. The error on
+    the breakpoints grows with the distance from their foci to the sweep
+    line, which the circle events of nearly collinear foci take far below
+    the sites, so the tolerance on their order is scaled by it.
+    """
+    box = fortune.bounding_box
+    y_sweep_line = fortune.sweep_line.get_height()
+    scale = max(box.x_max - box.x_min, box.y_max - y_sweep_line, 1)
+
+    check_beach_line(fortune.beach_line, y_sweep_line, BREAKPOINT_TOLERANCE * scale)
+
+
+def get_nearest_distances(points: np.ndarray, sites: np.ndarray, chunk_size=1024):
+    """
+    Distances of the (n, 2) array of points to their nearest site, by brute
+    force.
+    """
+    distances = np.empty(len(points))
+
+    for start in range(0, len(points), chunk_size):
+        chunk = points[start : start + chunk_size]
+        distances[start : start + chunk_size] = np.sqrt(
+            ((chunk[:, None, :] - sites[None, :, :]) ** 2).sum(axis=2).min(axis=1)
+        )
+
+    return distances
+
+
+def check_diagram(voronoi, n_samples: int = 1000, seed: int = 0):
+    """
+    Check a finished diagram against brute force, on at most @n_samples
+    vertices and as many edges: no site is closer to a vertex than the
+    sites of the faces around it, which are all at the same distance, and
+    the middle of an edge is as close to the sites of its faces as to its
+    nearest site. The half-edges are also checked to be consistent.
+    """
+    arrays = voronoi.to_arrays()
+    sites = arrays["sites"]
+
+    if len(sites) < 2:
+        return
+
+    twins, faces, origins = arrays["twins"], arrays["incident_faces"], arrays["origins"]
+    n_edges = len(twins)
+    edges = np.arange(n_edges)
+
+    _check((twins >= 0).all(), "A half-edge has no twin!")
+    _check((twins[twins] == edges).all(), "The twins are not symmetric!")
+    _check((faces != faces[twins]).all(), "A half-edge has the face of its twin!")
+    _check(np.isfinite(origins).all(), "An edge is not finished!")
+
+    scale = max(np.ptp(origins, axis=0).max(), 1)
+    tolerance = TOLERANCE * scale
+    rng = np.random.default_rng(seed)
+
+    # the middles of the edges, either side of which is a face
+    pairs = np.flatnonzero(twins > edges)
+    if len(pairs) > n_samples:
+        pairs = rng.choice(pairs, n_samples, replace=False)
+
+    middles = (origins[pairs] + origins[twins[pairs]]) / 2
+    nearest = get_nearest_distances(middles, sites)
+
+    for side in (faces[pairs], faces[twins[pairs]]):
+        inside = side >= 0
+        distances = np.hypot(*(middles[inside] - sites[side[inside]]).T)
+        _check(
+            (np.abs(distances - nearest[inside]) <= tolerance).all(),
+            "The middle of an edge is closer to another site than to its faces!",
+        )
+
+    # the vertices, around which the faces of the edges leaving them lie
+    vertices = arrays["vertices"]
+    if not len(vertices):
+        return
+
+    indices = np.arange(len(vertices))
+    if len(indices) > n_samples:
+        indices = rng.choice(indices, n_samples, replace=False)
+
+    nearest = np.full(len(vertices), np.nan)
+    nearest[indices] = get_nearest_distances(vertices[indices], sites)
+
+    starts = arrays["origin_vertices"]
+    inside = (faces >= 0) & np.isin(starts, indices)
+    distances = np.hypot(*(origins[inside] - sites[faces[inside]]).T)
+    _check(
+        (np.abs(distances - nearest[starts[inside]]) <= tolerance).all(),
+        "A vertex is closer to another site than to the sites around it!",
+    )
+
+
+def check_periodic(voronoi, site_indices: np.ndarray, domain):
+    """
+    Check a periodic diagram: the half-edges have twins, and the cells tile
+    the domain, their areas adding up to its area.
+    """
+    from .diagram import Diagram
+
+    diagram = Diagram.from_tesselation(voronoi, site_indices)
+    twins = diagram.arrays["twins"]
+    _check((twins[twins] == np.arange(len(twins))).all(), "Unmatched half-edges!")
+
+    points, offsets = diagram.get_cells()
+    x, y = points[:, 0], points[:, 1]
+    terms = x[:-1] * y[1:] - x[1:] * y[:-1]
+    terms[offsets[1:-1] - 1] = 0  # from the end of a ring to the next one
+    areas = np.add.reduceat(terms, offsets[:-1]) / 2
+    area = (domain.x_max - domain.x_min) * (domain.y_max - domain.y_min)
+    _check(
+        abs(areas.sum() - area) <= TOLERANCE * area,
+        "The cells do not tile the periodic domain!",
+    )
+
+
+def _get_window_edges(diagram, window, tolerance: float):
+    # the parts of the edges between two sites inside the window, by the
+    # pair of their sites
+    from .geom_utils import clip_segments
+
+    segments = diagram.get_segments()
+    sites = np.sort(diagram.get_edge_sites(), axis=1)
+    mask, starts, ends = clip_segments(segments[:, 0], segments[:, 1], window)
+    sites = sites[mask]
+
+    keep = (sites[:, 0] >= 0) & (np.hypot(*(ends - starts).T) > tolerance)
+    ends = np.sort(np.stack((starts, ends), axis=1)[keep], axis=1)
+
+    return dict(zip(map(tuple, sites[keep].tolist()), ends))
+
+
+def check_window(sites: np.ndarray, window):
+    """
+    Check the diagram of a window against the full diagram of the sites:
+    they have the same edges inside the window, between the same sites,
+    and the cells of the former tile the window.
+    """
+    from .diagram import Diagram
+    from .fortune import Fortune
+    from .window import compute_window
+
+    fortune = Fortune(sites)
+    expected = Diagram.from_tesselation(
+        fortune.launch(plot=False), fortune.site_indices
+    )
+    diagram = Diagram.from_tesselation(*compute_window(sites, window))
+
+    width, height = window.x_max - window.x_min, window.y_max - window.y_min
+    tolerance = TOLERANCE * max(np.abs(window.get_coordinates()).max(), 1)
+    edges = _get_window_edges(diagram, window, tolerance)
+    expected_edges = _get_window_edges(expected, window, tolerance)
+
+    _check(edges.keys() == expected_edges.keys(), "The edges of the window differ!")
+    _check(
+        all(
+            np.abs(edges[key] - expected_edges[key]).max() <= tolerance for key in edges
+        ),
+        "The edges of the window are misplaced!",
+    )
+
+    # the cells clipped to the window may not contain their site, so their
+    # area is summed along their half-edges, which go clockwise
+    arrays = diagram.arrays
+    inside = arrays["incident_faces"] >= 0
+    starts = arrays["origins"][inside]
+    ends = arrays["origins"][arrays["nexts"][inside]]
+    area = (starts[:, 1] * ends[:, 0] - starts[:, 0] * ends[:, 1]).sum() / 2
+    _check(
+        abs(area - width * height) <= tolerance * (width + height),
+        "The cells do not tile the window!",
+    )
+
+
+def get_fuzz_inputs(rng, max_sites: int = 200):
+    """
+    Yield site sets to fuzz the sweep with, both random and degenerate:
+    grids, rows and columns, duplicates, cocircular and clustered sites.
+    """
+    n = int(rng.integers(2, max_sites))
+    side = max(int(math.sqrt(n)), 2)
+    grid = np.stack(np.meshgrid(np.arange(side), np.arange(side)), axis=-1)
+    grid = grid.reshape(-1, 2).astype(float)
+    angles = (rng.random() + np.arange(n)) * 2 * np.pi / n
+
+    yield "uniform", rng.random((n, 2))
+    yield "integers", rng.integers(0, side, (n, 2)).astype(float)
+    yield "grid", grid
+    yield "jittered grid", grid + rng.random(grid.shape) * 1e-4
+    yield "row", np.stack((rng.random(n), np.zeros(n)), axis=1)
+    yield "column", np.stack((np.zeros(n), rng.random(n)), axis=1)
+    yield "top row", np.concatenate(
+        (np.stack((rng.random(side), np.full(side, 2.0)), axis=1), rng.random((n, 2)))
+    )
+    yield "duplicates", np.repeat(rng.random((max(n // 3, 2), 2)), 3, axis=0)
+    yield "circle", np.stack((np.cos(angles), np.sin(angles)), axis=1)
+    yield "clusters", (
+        rng.random((side, 2))[rng.integers(0, side, n)] + rng.normal(0, 1e-3, (n, 2))
+    )
+
+
+def get_periodic_fuzz_inputs(rng, max_sites: int = 200):
+    """
+    Yield site sets and domains to fuzz the periodic diagrams with, among
+    which sites equal modulo the period up to rounding errors.
+    """
+    from .bounding_box import BoundingBox
+
+    unit = BoundingBox.from_limits(0, 1, 0, 1)
+    wide = BoundingBox.from_limits(0, 2, 0, 1)
+    sites = rng.random((int(rng.integers(2, max_sites)), 2))
+
+    yield "periodic uniform", sites, unit
+    yield "periodic copies", np.concatenate((sites, sites + (1, -3))), unit
+    yield "periodic ulps", np.array([[0.2, 0.3], [0.2, 1.3], [0.6, 0.6]]), unit
+    yield "periodic wide ulps", np.array([[0.1, 0.1], [2.1, 1.1], [1, 0.5]]), wide
+
+
+def get_window_fuzz_inputs(rng, max_sites: int = 200):
+    """
+    Yield site sets and windows to fuzz the diagrams of windows with: a
+    window among the sites, one across their corner, one inside a cell,
+    and sites on a grid.
+    """
+    from .bounding_box import BoundingBox
+
+    n = int(rng.integers(2, max_sites))
+    sites = rng.random((n, 2)) * 10
+    x, y = rng.random(2) * 8
+    side = max(int(math.sqrt(n)), 2)
+    grid = np.stack(np.meshgrid(np.arange(side), np.arange(side)), axis=-1)
+
+    grid = grid.reshape(-1, 2).astype(float)
+
+    # an edge traced beyond the end of the sweep used to cross its corner
+    ray_sites = np.random.default_rng(17).random((400, 2)) * 10
+    ray_window = BoundingBox.from_limits(3, 5, 4, 6)
+
+    yield "window", sites, BoundingBox.from_limits(x, x + 2, y, y + 2)
+    yield "corner window", sites, BoundingBox.from_limits(-1, 1, 9, 11)
+    yield "tiny window", sites, BoundingBox.from_limits(x, x + 1e-3, y, y + 1e-3)
+    yield "grid window", grid, BoundingBox.from_limits(0.5, side / 2, 0.25, side / 2)
+    yield "window ray", ray_sites, ray_window
+
+
+def fuzz(n_rounds: int = 10, max_sites: int = 200, seed: int = 0):
+    """
+    Run the sweep with the validation mode on random and degenerate inputs,
+    and the periodic diagrams and the ones of windows on their own inputs,
+    and return the failures as (round, name, sites, exception) tuples.
+    """
+    from .fortune import Fortune
+    from .periodic import compute_periodic
+
+    rng = np.random.default_rng(seed)
+    failures = []
+
+    for i in range(n_rounds):
+        for name, sites in get_fuzz_inputs(rng, max_sites):
+            try:
+                Fortune(sites, validate=True).launch(plot=False)
+            except Exception as exception:
+                failures.append((i, name, sites, exception))
+
+        for name, sites, domain in get_periodic_fuzz_inputs(rng, max_sites):
+            try:
+                check_periodic(*compute_periodic(sites, domain), domain)
+            except Exception as exception:
+                failures.append((i, name, sites, exception))
+
+        for name, sites, window in get_window_fuzz_inputs(rng, max_sites):
+            try:
+                check_window(sites, window)
+            except Exception as exception:
+                failures.append((i, name, sites, exception))
+
+    return failures
+
+
+if __name__ == "__main__":
+    for i, name, sites, exception in fuzz():
+        print(f"round {i}, {name} ({len(sites)} sites): {exception!r}")
@@ -1,10 +1,11 @@
 import os
-import shutil
 import numpy as np
-import matplotlib.pyplot as plt
-from matplotlib.backend_bases import MouseButton
 
 from matplotlib import patches
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.collections import LineCollection
+
 from .event_queue import CircleEvent
 
 
@@ -20,6 +21,41 @@ class Colors:
     bounding_box = "black"
 
 
+def get_points(points: list):
+    """
+    Stack the coordinates of some points into a (n, 2) array.
+    """
+    if isinstance(points, np.ndarray):
+        return points.reshape(-1, 2)
+
+    return np.array([(point.x, point.y) for point in points], dtype=float).reshape(
+        -1, 2
+    )
+
+
+def get_segments(edges: list):
+    """
+    Get the finite segments drawn by some half-edges as a (n, 2, 2) array,
+    each pair of twins being drawn only once.
+    """
+    if isinstance(edges, np.ndarray):
+        return edges.reshape(-1, 2, 2)
+
+    seen = set()
+    segments = []
+
+    for edge in edges:
+        if not (edge and edge.twin) or id(edge.twin) in seen:
+            continue
+
+        seen.add(id(edge))
+        segments.append((edge.get_origin_coords(), edge.twin.get_origin_coords()))
+
+    segments = np.array(segments, dtype=float).reshape(-1, 2, 2)
+
+    return segments[np.isfinite(segments).all(axis=(1, 2))]
+
+
 class Visualizer:
     def __init__(
         self, voronoi, bounding_box, offset=2, figsize=(8, 8), save_dir="images"
@@ -27,6 +63,13 @@ class Visualizer:
         """
         A useful class to visualize the Fortune's algorithm execution
         and the resulting Voronoi tesselation.
+
+        A single figure is kept for the whole run and its artists are updated
+        in place, so that a frame costs the same whatever the number of
+        frames already rendered. Only the object-oriented API of Matplotlib
+        is used, no global pyplot state is involved, and the frames are
+        saved to @save_dir without removing anything from it, so that
+        visualizers saving to distinct directories can run in threads.
         """
         self.voronoi = voronoi
         self.bounding_box = bounding_box
@@ -38,13 +81,19 @@ class Visualizer:
             bounding_box, offset
         )
 
-        plt.close("all")
-        _, self.canvas = plt.subplots(figsize=figsize)
+        self.figure = Figure(figsize=figsize)
+        FigureCanvasAgg(self.figure)
+        self.canvas = self.figure.add_subplot()
+        self.canvas.set_xticks([])
+        self.canvas.set_yticks([])
         self.set_limits()
+        self.figure.tight_layout()
+        self.init_artists()
 
-        if os.path.exists(save_dir):
-            shutil.rmtree(save_dir)
-        os.makedirs(save_dir)
+        if not save_dir:
+            return
+
+        os.makedirs(save_dir, exist_ok=True)
 
     @staticmethod
     def canvas_size(bounding_box, offset: int):
@@ -70,17 +119,66 @@ class Visualizer:
         self.canvas.set_xlim(self.x_min, self.x_max)
         return
 
-    def plot_bounding_box(self):
+    def init_artists(self):
         """
-        Plot the outline.
+        Create once the artists that are updated at every frame.
         """
-        poly = patches.Polygon(
+        empty = np.empty((0, 2))
+
+        (self.sweep_line_artist,) = self.canvas.plot([], [], color=Colors.sweep_line)
+        self.edges_artist = LineCollection([], colors=Colors.edge, zorder=2)
+        self.canvas.add_collection(self.edges_artist)
+        self.vertices_artist = self.canvas.scatter(
+            empty[:, 0], empty[:, 1], s=50, color=Colors.vertices, zorder=10
+        )
+        self.sites_artist = self.canvas.scatter(
+            empty[:, 0], empty[:, 1], s=50, color=Colors.sites, zorder=10
+        )
+        self.arcs_artist = LineCollection(
+            [], colors=Colors.arc, linestyles="--", zorder=2
+        )
+        self.canvas.add_collection(self.arcs_artist)
+        (self.beach_line_artist,) = self.canvas.plot([], [], color=Colors.beach_line)
+        self.circle_artist = patches.Circle((0, 0), 1, fill=False, linewidth=2)
+        self.canvas.add_patch(self.circle_artist)
+        self.center_artist = self.canvas.scatter(empty[:, 0], empty[:, 1], s=50)
+        self.bounding_box_artist = patches.Polygon(
             self.bounding_box.get_coordinates(),
             fill=False,
             edgecolor=Colors.bounding_box,
         )
+        self.canvas.add_patch(self.bounding_box_artist)
+
+        self.artists = [
+            self.sweep_line_artist,
+            self.edges_artist,
+            self.vertices_artist,
+            self.sites_artist,
+            self.arcs_artist,
+            self.beach_line_artist,
+            self.circle_artist,
+            self.center_artist,
+            self.bounding_box_artist,
+        ]
+        self.clear()
+
+        return
+
+    def clear(self):
+        """
+        Hide all the artists.
+        """
+        for artist in self.artists:
+            artist.set_visible(False)
+
+        return
 
-        self.canvas.add_patch(poly)
+    def plot_bounding_box(self):
+        """
+        Plot the outline.
+        """
+        self.bounding_box_artist.set_xy(self.bounding_box.get_coordinates())
+        self.bounding_box_artist.set_visible(True)
         return
 
     def plot_vertices(
@@ -93,12 +191,10 @@ class Visualizer:
         """
         Display the vertices.
         """
-        vertices = vertices or self.voronoi.vertices
-
-        xs = [vertex.x for vertex in vertices]
-        ys = [vertex.y for vertex in vertices]
+        vertices = self.voronoi.vertices if vertices is None else vertices
 
-        self.canvas.scatter(xs, ys, s=50, color=color, zorder=zorder, **kwargs)
+        self.vertices_artist.set_offsets(get_points(vertices))
+        self.vertices_artist.set(color=color, zorder=zorder, visible=True, **kwargs)
 
         return
 
@@ -112,23 +208,12 @@ class Visualizer:
         """
         Plot the sites.
         """
-        points = sites or self.voronoi.sites
-
-        xs = [point.x for point in points]
-        ys = [point.y for point in points]
-
-        self.canvas.scatter(xs, ys, s=50, color=color, zorder=zorder, **kwargs)
-
-        return
-
-    def plot_edge(self, edge, color=Colors.edge):
-        if not (edge and edge.twin):
-            return
+        points = (
+            [face.site for face in self.voronoi.faces] if sites is None else sites
+        )
 
-        start, end = edge.origin, edge.twin.origin
-        x_range = [start.x, end.x]
-        y_range = [start.y, end.y]
-        self.canvas.plot(x_range, y_range, color)
+        self.sites_artist.set_offsets(get_points(points))
+        self.sites_artist.set(color=color, zorder=zorder, visible=True, **kwargs)
 
         return
 
@@ -136,29 +221,40 @@ class Visualizer:
         """
         Plot the borders of the cells.
         """
-        for edge in edges:
-            self.plot_edge(edge, color=color)
-            self.plot_edge(edge.twin, color=color)
+        edges = self.voronoi.half_edges if edges is None else edges
+
+        self.edges_artist.set_segments(get_segments(edges))
+        self.edges_artist.set(color=color, visible=True, **kwargs)
 
         return
 
     def plot_arcs(self, arcs: list, y_sweep_line: float, n_points: int = 1000):
         """
-        Plot the arcs.
+        Plot the arcs, given either as Arc objects or as the (n, 2) array
+        of their foci.
         """
+        if not isinstance(arcs, np.ndarray):
+            arcs = [arc.focus for arc in arcs]
+
+        foci = get_points(arcs)
+        foci = foci[foci[:, 1] != y_sweep_line]
+
+        if not len(foci):
+            return
+
         x = np.linspace(float(self.x_min), float(self.x_max), n_points)
-        arc_plots = []
+        focus_x, focus_y = foci[:, :1], foci[:, 1:]
+        arc_plots = (
+            x**2 - 2 * focus_x * x + focus_x**2 + focus_y**2 - y_sweep_line**2
+        ) / (2 * (focus_y - y_sweep_line))
 
-        for arc in arcs:
-            arc_plot = arc.get_plot(x, y_sweep_line)
-            if arc_plot:
-                self.canvas.plot(x, arc_plot, linestyle="--", color=Colors.arc)
-                arc_plots.append(arc_plot)
+        xs = np.broadcast_to(x, arc_plots.shape)
+        self.arcs_artist.set_segments(np.stack((xs, arc_plots), axis=-1))
+        self.arcs_artist.set_visible(True)
 
         # beach_line
-        if arc_plots:
-            bottom = np.min(arc_plots, axis=0)
-            self.canvas.plot(x, bottom, color=Colors.beach_line)
+        self.beach_line_artist.set_data(x, np.min(arc_plots, axis=0))
+        self.beach_line_artist.set_visible(True)
 
         return
 
@@ -171,7 +267,8 @@ class Visualizer:
 
         x_range = [self.x_min, self.x_max]
         y_range = [y_sweep_line, y_sweep_line]
-        self.canvas.plot(x_range, y_range, color=Colors.sweep_line)
+        self.sweep_line_artist.set_data(x_range, y_range)
+        self.sweep_line_artist.set_visible(True)
 
         return
 
@@ -187,11 +284,11 @@ class Visualizer:
         Plot a circle.
         """
         color = Colors.valid_circle if is_valid else Colors.invalid_circle
-        circle = plt.Circle((x, y), radius, fill=False, color=color, linewidth=2)
-        self.canvas.add_artist(circle)
+        self.circle_artist.set(center=(x, y), radius=radius, color=color, visible=True)
 
         if plot_center:
-            self.canvas.scatter(x, y, s=50, color=color)
+            self.center_artist.set_offsets([(x, y)])
+            self.center_artist.set(color=color, visible=True)
 
         return
 
@@ -217,24 +314,27 @@ class Visualizer:
         """
         Convenient method to display sevral components.
         """
-        plt.close("all")
-        _, self.canvas = plt.subplots(figsize=self.figsize)
-        self.set_limits()
+        self.clear()
 
-        plt.xticks([])
-        plt.yticks([])
-        plt.tight_layout()
+        given = lambda x: x is not None and len(x) > 0
 
         self.plot_sweep_line(y_sweep_line) if y_sweep_line else np.nan
-        self.plot_edges(edges) if edges else np.nan
-        self.plot_vertices(vertices) if vertices else np.nan
-        self.plot_sites(sites) if sites else np.nan
-        self.plot_arcs(arcs, y_sweep_line) if arcs and y_sweep_line else np.nan
+        self.plot_edges(edges) if given(edges) else np.nan
+        self.plot_vertices(vertices) if given(vertices) else np.nan
+        self.plot_sites(sites) if given(sites) else np.nan
+        self.plot_arcs(arcs, y_sweep_line) if given(arcs) and y_sweep_line else np.nan
         self.plot_circle_event(event) if event and isinstance(
             event, CircleEvent
         ) else np.nan
 
-        path = os.path.join(self.save_dir, f"{fig_name}.png")
-        plt.savefig(path) if fig_name else np.nan
+        if fig_name:
+            self.figure.savefig(os.path.join(self.save_dir, f"{fig_name}.png"))
 
         return
+
+    def render(self):
+        """
+        Rasterize the current frame into a (height, width, 3) RGB array.
+        """
+        self.figure.canvas.draw()
+        return np.asarray(self.figure.canvas.buffer_rgba())[..., :3].copy()
@@ -0,0 +1,192 @@
+import numpy as np
+
+from .bounding_box import BoundingBox
+from .fortune import Fortune
+from .geom_utils import finish_edges, get_clipping_bounds
+from .point import Point
+from .tesselation import Vertex
+
+
+def get_distances(sites: np.ndarray, window: BoundingBox):
+    """
+    Distances of the sites to the window, 0 for the sites inside it.
+    """
+    dx = np.maximum(
+        np.maximum(window.x_min - sites[:, 0], sites[:, 0] - window.x_max), 0
+    )
+    dy = np.maximum(
+        np.maximum(window.y_min - sites[:, 1], sites[:, 1] - window.y_max), 0
+    )
+    return np.hypot(dx, dy)
+
+
+def get_covering_radius(
+    sites: np.ndarray, window: BoundingBox, resolution: int = 32, chunk_size: int = 256
+):
+    """
+    Upper bound of the distance from any point of the window to its nearest
+    site among @sites. The window is split into a grid of @resolution x
+    @resolution cells, and the distance from any point of a cell to its
+    nearest site is at most the one of the center of the cell plus the
+    half-diagonal of the cell.
+    """
+    width = window.x_max - window.x_min
+    height = window.y_max - window.y_min
+    x = window.x_min + (np.arange(resolution) + 0.5) * width / resolution
+    y = window.y_min + (np.arange(resolution) + 0.5) * height / resolution
+    centers = np.stack(np.meshgrid(x, y), axis=-1).reshape(-1, 2)
+
+    radius = 0
+    for i in range(0, len(centers), chunk_size):
+        deltas = centers[i : i + chunk_size, None] - sites[None]
+        distances = np.einsum("ijk,ijk->ij", deltas, deltas).min(axis=1)
+        radius = max(radius, np.sqrt(distances.max()))
+
+    return radius + np.hypot(width, height) / resolution / 2
+
+
+def select_sites(sites: np.ndarray, window: BoundingBox, resolution: int = 32):
+    """
+    Get the indices of the sites whose cells may intersect the window, that
+    is the sites lying within the covering radius of the window, and the
+    covering radius itself.
+    """
+    sites = np.asarray(sites, dtype=float).reshape(-1, 2)
+    distances = get_distances(sites, window)
+
+    # bound the covering radius using only the sites close to the window,
+    # since any subset of the sites gives an upper bound
+    margin = np.partition(distances, min(8, len(sites) - 1))[min(8, len(sites) - 1)]
+
+    while True:
+        candidates = sites[distances <= margin]
+        radius = get_covering_radius(candidates, window, resolution)
+
+        # all the sites within the radius were candidates
+        if radius <= margin:
+            break
+
+        margin = radius
+
+    return np.flatnonzero(distances <= radius), radius
+
+
+def end_edges(fortune: Fortune, y_sweep_line: float):
+    """
+    End the edges traced by the breakpoints of the beach line where the
+    breakpoints are for the sweep line at @y_sweep_line, rather than
+    extending them as rays.
+    """
+    for node in fortune.beach_line.get_nodes_ordered()[1::2]:
+        if node.half_edge is not None and node.half_edge.origin is None:
+            node.half_edge.origin = Vertex(node.get_coords(y_sweep_line))
+
+
+def _snap(points: np.ndarray, window: BoundingBox):
+    # set the coordinate of the side of the window each point lies on
+    # exactly, as the tesselation locates the points on its outline by it
+    limits = np.array([window.x_min, window.x_max, window.y_min, window.y_max])
+    distances = np.abs(np.repeat(points, 2, axis=1) - limits)
+    sides = distances.argmin(axis=1)
+    points[np.arange(len(points)), sides // 2] = limits[sides]
+    return points
+
+
+def clip_tesselation(voronoi, window: BoundingBox):
+    """
+    Clip a tesselation whose edges all end on a vertex to @window, and close
+    it on the window. The faces left out of the window are removed. Return
+    the mask of the faces kept.
+    """
+    pairs = [edge for edge in voronoi.half_edges if id(edge) < id(edge.twin)]
+    starts = np.array([(edge.origin.x, edge.origin.y) for edge in pairs]).reshape(-1, 2)
+    ends = np.array(
+        [(edge.twin.origin.x, edge.twin.origin.y) for edge in pairs]
+    ).reshape(-1, 2)
+
+    t_in, t_out, _ = get_clipping_bounds(starts, ends - starts, window)
+    t_in, t_out = np.maximum(t_in, 0), np.minimum(t_out, 1)
+
+    # the edges only touching the window are left out
+    inside = t_in < t_out
+    clipped_starts = _snap(starts + t_in[:, None] * (ends - starts), window)
+    clipped_ends = _snap(starts + t_out[:, None] * (ends - starts), window)
+
+    edges = []
+    for edge, is_inside, t_0, t_1, start, end in zip(
+        pairs,
+        inside.tolist(),
+        t_in.tolist(),
+        t_out.tolist(),
+        clipped_starts.tolist(),
+        clipped_ends.tolist(),
+    ):
+        if not is_inside:
+            continue
+
+        if t_0 > 0:
+            edge.origin = Vertex(start)
+        if t_1 < 1:
+            edge.twin.origin = Vertex(end)
+        edges.extend((edge, edge.twin))
+
+    faces = {id(edge.incident_face) for edge in edges}
+    if faces:
+        keep = [id(face) in faces for face in voronoi.faces]
+    else:
+        # the window lies inside a single cell, the one of the site nearest
+        # to its center
+        center = np.array(window.get_coordinates()).mean(axis=0)
+        sites = np.array([(face.site.x, face.site.y) for face in voronoi.faces])
+        keep = np.arange(len(sites)) == np.hypot(*(sites - center).T).argmin()
+
+    vertices = {id(edge.origin) for edge in edges}
+    voronoi.vertices = [vertex for vertex in voronoi.vertices if id(vertex) in vertices]
+    voronoi.half_edges = edges
+    voronoi.faces = [face for face, is_kept in zip(voronoi.faces, keep) if is_kept]
+    voronoi.faces_by_site = {}
+
+    for face in voronoi.faces:
+        face.outer_component = None
+
+    voronoi.close(window)
+
+    return np.array(keep, dtype=bool)
+
+
+def compute_window(
+    sites: list, window: BoundingBox, resolution: int = 32, offset: float = 0.5
+):
+    """
+    Compute the Voronoi diagram of some sites inside a window only. The sweep
+    is run on the sites whose cells may intersect the window, and stopped as
+    soon as no event can define a vertex or an edge inside it anymore: every
+    point of the diagram lying in the window is traced while the sweep line
+    is above the bottom of the window minus the covering radius. The edges
+    still traced by the beach line then end where their breakpoints are,
+    since what they trace beyond lies outside the window, and the diagram
+    is clipped to the window.
+
+    Return the tesselation of the window, and the indices of the sites of
+    its faces in @sites.
+    """
+    sites = np.asarray(sites, dtype=float).reshape(-1, 2)
+    indices, radius = select_sites(sites, window, resolution)
+
+    fortune = Fortune(sites[indices], offset)
+    y_stop = window.y_min - radius
+
+    while not fortune.event_queue.is_empty() and fortune.event_queue.peek().y >= y_stop:
+        fortune.step()
+
+    end_edges(fortune, y_stop)
+
+    # the edges left open are the upward ones of sites at the same height
+    corners = [Point(corner) for corner in window.get_coordinates()]
+    finish_edges(
+        fortune.voronoi.half_edges,
+        BoundingBox(fortune.sites + fortune.voronoi.vertices + corners, offset),
+    )
+    keep = clip_tesselation(fortune.voronoi, window)
+
+    return fortune.voronoi, indices[fortune.site_indices][keep]